@@ -1,4 +1,5 @@
 import os
+from typing import Dict
 from pydantic_settings import BaseSettings
 
 
@@ -9,10 +10,96 @@ class Settings(BaseSettings):
     MQTT_USERNAME: str = ""
     MQTT_PASSWORD: str = ""
     MQTT_CLIENT_ID: str = "python_mqtt_client"
+    # Per-plugin callback dispatch, overridable by a plugin's DISPATCH dict
+    MQTT_PLUGIN_WORKERS: int = 1
+    MQTT_PLUGIN_QUEUE_SIZE: int = 100
+    # "block" holds the network thread until there is room, "drop" discards
+    MQTT_PLUGIN_OVERFLOW: str = "block"
+    # Seconds between plugin dispatch stats reports, 0 disables them
+    MQTT_STATS_INTERVAL: float = 60.0
+    # Seconds between checks of --plugins-dir when hot reload is on
+    MQTT_PLUGIN_RELOAD_INTERVAL: float = 1.0
     # Database Configuration
     DB_PATH: str = os.path.join(
         os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data", "lancedb"
     )
+    # Seconds between re-opens of the shared table handle in the API process,
+    # so a re-initialized table is picked up without reopening per request
+    DB_TABLE_REFRESH_SECONDS: float = 5.0
+    # How spaces are stored: "shared" keeps them all in init_qa_action and
+    # filters on the space column, "table" gives each space its own table
+    # (init_qa_action__<space>) that the API opens on first use
+    SPACE_STORAGE: str = "shared"
+    # Memory the API may spend on open spaces (table handles, NumPy indexes,
+    # answer caches); least recently used spaces are closed beyond it
+    SPACE_CACHE_MEMORY_MB: float = 512
+
+    # How the intent table is searched: "numpy" loads every embedding into
+    # one in-memory matrix, "lancedb" queries the table, "auto" uses numpy up
+    # to SEARCH_NUMPY_MAX_ROWS rows and lancedb above that
+    SEARCH_ENGINE: str = "auto"
+    SEARCH_NUMPY_MAX_ROWS: int = 50000
+
+    # ANN index on content_embedding, built by init/sync once the table has
+    # ANN_INDEX_MIN_ROWS rows. IVF_PQ, IVF_HNSW_PQ, IVF_HNSW_SQ or IVF_FLAT.
+    ANN_INDEX_MIN_ROWS: int = 50000
+    ANN_INDEX_TYPE: str = "IVF_PQ"
+    # 0 picks sqrt(rows) partitions and LanceDB's default sub-vector count
+    ANN_NUM_PARTITIONS: int = 0
+    ANN_NUM_SUB_VECTORS: int = 0
+    # Query-time recall/latency trade-off: partitions probed, and how many
+    # times k candidates are re-ranked with exact distances (0 disables)
+    ANN_NPROBES: int = 20
+    ANN_REFINE_FACTOR: int = 10
+
+    # Per-space match thresholds, e.g. SPACE_THRESHOLDS='{"lights": 0.4}';
+    # spaces not listed use intents.MATCH_THRESHOLD (0.55)
+    SPACE_THRESHOLDS: Dict[str, float] = {}
+    # Optional reranking of ambiguous queries: "none", "lexical" or
+    # "cross-encoder". It only runs when the best distance is below the
+    # threshold by less than RERANK_BAND, over those of the top
+    # RETRIEVAL_TOP_K candidates below the threshold, and its pick must score
+    # at least RERANK_MIN_SCORE; it never accepts a candidate past the
+    # threshold.
+    RERANKER: str = "none"
+    RETRIEVAL_TOP_K: int = 5
+    RERANK_BAND: float = 0.15
+    RERANK_MIN_SCORE: float = 0.5
+    RERANK_CROSS_ENCODER_MODEL: str = "cross-encoder/stsb-TinyBERT-L-4"
+
+    # Exact-match index and LRU of answers, so repeated queries skip the
+    # embedding model and the vector search
+    ANSWER_CACHE_ENABLED: bool = True
+    ANSWER_CACHE_SIZE: int = 1024
+
+    # /api/text/chat/batch: largest non-streamed batch, and queries embedded
+    # and searched per step when streaming NDJSON
+    CHAT_BATCH_MAX_SIZE: int = 1000
+    CHAT_BATCH_STREAM_CHUNK: int = 256
+
+    # Embedding backend: "torch" (float32, MPS when available), "torch-int8"
+    # (Linear layers dynamically quantized, CPU) or "onnx" (ONNX Runtime on
+    # CPU, exported on first use; needs onnxruntime)
+    EMBED_BACKEND: str = "torch"
+    # Intra-op threads for the embedding backend, 0 keeps the library default
+    EMBED_THREADS: int = 0
+
+    # Worker threads the API runs embedding, search and reranking on, and
+    # how many more requests may wait for them before new ones get a 503
+    # with a Retry-After hint
+    BLOCKING_WORKERS: int = 4
+    BLOCKING_MAX_QUEUE: int = 64
+
+    # Embedding micro-batching for the chat endpoint
+    EMBED_BATCH_MAX_SIZE: int = 32
+    EMBED_BATCH_MAX_WAIT_MS: float = 2.0
+
+    # Persistent embedding cache, stored next to sentence_transformer_cache
+    EMBED_CACHE_ENABLED: bool = True
+    EMBED_CACHE_PATH: str = os.path.join(
+        os.path.dirname(os.path.dirname(__file__)), "services", "embedding_cache"
+    )
+    EMBED_CACHE_LRU_SIZE: int = 4096
 
     # Init file configuration - checks environment variable MINIMAX_INIT_FILE first
     INIT_FILE: str = os.getenv(
@@ -20,6 +107,27 @@ class Settings(BaseSettings):
         os.path.join(os.path.dirname(__file__), "..", "scripts", "test_text.csv"),
     )
 
+    # Rows embedded and written per chunk when ingesting the init file
+    INIT_CHUNK_SIZE: int = 512
+    # How action payloads are stored and published: "json" or "msgpack"
+    # (needs the msgpack package). Plugins decode either.
+    ACTION_PAYLOAD_ENCODING: str = "json"
+
+    # Speech-to-text backend: whisper, whisper-int8 or faster-whisper
+    STT_BACKEND: str = "whisper"
+    STT_MODEL_SIZE: str = "base"
+    # Intra-op threads for the STT model, 0 keeps the library default
+    STT_THREADS: int = 0
+    # Bounded queue size between STT pipeline stages
+    STT_STAGE_QUEUE_SIZE: int = 4
+    # Seconds between STT pipeline stats reports, 0 disables them
+    STT_STATS_INTERVAL: float = 60.0
+    # How the STT worker resolves commands: "http" calls the API over a
+    # keep-alive session, "in_process" runs the same lookup without HTTP
+    STT_INTENT_MODE: str = "http"
+    STT_API_URL: str = "http://localhost:8000/api/text/chat/"
+    STT_API_TIMEOUT: float = 10.0
+
     # Other application settings can be added here
     APP_NAME: str = "Minimax CORE API"
     DEBUG: bool = False
@@ -1,19 +1,68 @@
+import asyncio
+import json
 import os
-from fastapi import FastAPI
+from typing import List
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from dotenv import load_dotenv
 from pydantic import BaseModel
-import lancedb
 from minimax.app.core.config import settings
 from minimax.app.scripts.init_mini_max import remove_init, initialize
-from minimax.app.services.inference import get_text_embeddings
-from minimax.app.core.config import settings
+from minimax.app.services.inference import (
+    EmbeddingBatcher,
+    get_embedding_cache,
+    get_model,
+)
+from minimax.app.services.executor import BoundedExecutor, Overloaded
+from minimax.app.services.intents import (
+    MATCH_THRESHOLD,
+    answer_from_results,
+    public_answer,
+    resolve_batch,
+)
+from minimax.app.services.spaces import create_space_registry
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One LanceDB connection for the life of the process. The shared table,
+    # its search index and answer cache are loaded up front; per-space
+    # tables are opened on their first query.
+    app.state.spaces = await asyncio.to_thread(create_space_registry().connect)
+    # Load the embedding model before serving so the first query stays fast
+    await asyncio.to_thread(get_model)
+    # Blocking work runs here, never on the event loop
+    app.state.executor = BoundedExecutor(
+        settings.BLOCKING_WORKERS, settings.BLOCKING_MAX_QUEUE
+    )
+    app.state.embedder = await EmbeddingBatcher(
+        max_batch_size=settings.EMBED_BATCH_MAX_SIZE,
+        max_wait_ms=settings.EMBED_BATCH_MAX_WAIT_MS,
+        executor=app.state.executor,
+    ).start()
+    yield
+    await app.state.embedder.stop()
+    app.state.executor.shutdown()
+    app.state.spaces.close()
 
-app = FastAPI()
+
+app = FastAPI(lifespan=lifespan)
 
 # app.include_router(data_collection.router)
 # app.include_router(text.router)
 
 
+@app.exception_handler(Overloaded)
+async def overloaded(request: Request, exc: Overloaded):
+    # Fail fast rather than queue work the client would time out on
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc), "retry_after": exc.retry_after},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
 @app.get("/")
 async def root():
     return {"New Phone": "Who Dis?"}
@@ -24,39 +73,169 @@ class TextSearchRequest(BaseModel):
     space: str
 
 
+class TextBatchRequest(BaseModel):
+    queries: List[TextSearchRequest]
+    # Stream one NDJSON line per answer instead of a single JSON list
+    stream: bool = False
+
+
+@app.get("/api/stats/", tags=["stats"])
+async def stats():
+    return {
+        "spaces": app.state.spaces.stats(),
+        "embedder": app.state.embedder.stats(),
+        "executor": app.state.executor.stats(),
+        "embedding_cache": (
+            get_embedding_cache().stats() if settings.EMBED_CACHE_ENABLED else None
+        ),
+    }
+
+
+def _open_cached(space: str, content: str):
+    """
+    (Space, table, cached answer) for a query; Space and table are None if
+    the space has no table. Opening can load the space or re-open its table,
+    and the lookup can rebuild the answer cache, so this runs on the executor.
+    """
+    loaded, table = app.state.spaces.open(space)
+    answer = None
+    if loaded is not None and loaded.answers is not None:
+        answer = loaded.answers.lookup(table, content, space)
+    return loaded, table, answer
+
+
+async def _open_space(space: str):
+    """(Space, table) for space, or (None, None) if it has no table."""
+    return await app.state.executor.run(app.state.spaces.open, space)
+
+
 @app.post("/api/text/chat/", tags=["text"])
 async def search_similar_text(req: TextSearchRequest):
-    # Connect to LanceDB
-    db = lancedb.connect(settings.DB_PATH)
+    # Assume tables exist (initialized by CLI)
+    executor = app.state.executor
+    # Admitted before anything reaches the pool: an overload is a 503 at once,
+    # and the pool's queue stays bounded by the admission limit
+    with executor.admit():
+        loaded, table, answer = await executor.run(_open_cached, req.space, req.content)
+        if loaded is None:
+            return public_answer(answer_from_results([]))
+        if answer is not None:
+            return public_answer(answer)
 
-    # Assume table exists (initialized by CLI)
-    table = db.open_table("init_qa_action")
+        embedding = await app.state.embedder.embed(req.content)
+        answer = await executor.run(
+            loaded.retriever.answer, table, req.content, embedding, req.space
+        )
+    if loaded.answers is not None:
+        loaded.answers.store(table, req.content, answer, req.space)
+    return public_answer(answer)
 
-    embedding = get_text_embeddings([req.content])
 
-    # Search for similar text using the content
-    results = (
-        table.search(embedding, vector_column_name="content_embedding")
-        .limit(1)
-        .to_list()
-    )
+class RetrieveRequest(TextSearchRequest):
+    k: int = 5
+
+
+@app.post("/api/text/retrieve/", tags=["text"])
+async def retrieve_candidates(req: RetrieveRequest):
+    """
+    The top-k stored questions in req.space closest to req.content, with
+    their distances, plus the answer /api/text/chat/ would give.
+    """
+    executor = app.state.executor
+    with executor.admit():
+        loaded, table = await _open_space(req.space)
+        if loaded is None:
+            return {
+                "space": req.space,
+                "threshold": settings.SPACE_THRESHOLDS.get(req.space, MATCH_THRESHOLD),
+                "candidates": [],
+                "answer": public_answer(answer_from_results([])),
+            }
+        retriever = loaded.retriever
+        embedding = await app.state.embedder.embed(req.content)
+        results = await executor.run(
+            retriever.candidates, table, embedding, req.space, max(req.k, 1)
+        )
+        answer = await executor.run(
+            retriever.decide, req.content, results[: retriever.k], req.space
+        )
+    candidates = [
+        {
+            "content": row["content"],
+            "distance": row["_distance"],
+            **public_answer(row["metadata"]["use_cases"]["chatbot"]),
+        }
+        for row in results
+    ]
+    return {
+        "space": req.space,
+        "threshold": retriever.threshold(req.space),
+        "candidates": candidates,
+        "answer": public_answer(answer),
+    }
 
-    try:
-        if results:
-            result = results[0]
-            score = result["_distance"]
-            print("score: ", score)
-
-            if score < 0.55:
-                print("score from user query", score)
-                answer = result["metadata"]["use_cases"]["chatbot"]
-            else:
-                answer = {"answer": "I'm not sure how to help with that", "action": ""}
+
+def _resolve_batch(queries):
+    """resolve_batch for each space's queries; unknown spaces get no match."""
+    spaces = app.state.spaces
+    groups = {}
+    for i, (_, space) in enumerate(queries):
+        groups.setdefault(spaces.key(space), []).append(i)
+
+    results = [None] * len(queries)
+    for indexes in groups.values():
+        loaded, table = spaces.open(queries[indexes[0]][1])
+        if loaded is None:
+            answers = [answer_from_results([])] * len(indexes)
         else:
-            answer = {"answer": "No matching response found", "action": ""}
+            answers = resolve_batch(
+                table,
+                [queries[i] for i in indexes],
+                loaded.retriever,
+                loaded.answers,
+            )
+        for i, answer in zip(indexes, answers):
+            results[i] = answer
+    return results
+
+
+@app.post("/api/text/chat/batch", tags=["text"])
+async def search_similar_text_batch(req: TextBatchRequest):
+    """
+    Answers a list of queries with one embedding call and one vectorized
+    search per space, one answer per query in order, using the same threshold as
+    /api/text/chat/. With "stream": true, answers are streamed as NDJSON
+    lines ({"index": i, ...answer}), CHAT_BATCH_STREAM_CHUNK queries at a
+    time, so very large batches start returning before they are done.
+    """
+    queries = [(query.content, query.space) for query in req.queries]
+    executor = app.state.executor
+
+    if not req.stream:
+        if len(queries) > settings.CHAT_BATCH_MAX_SIZE:
+            raise HTTPException(
+                status_code=413,
+                detail=f"At most {settings.CHAT_BATCH_MAX_SIZE} queries per batch; "
+                'use "stream": true for more',
+            )
+        with executor.admit():
+            results = await executor.run(_resolve_batch, queries)
+        return [public_answer(answer) for answer in results]
+
+    # Checked before the response starts, so an overload is still a 503. The
+    # slot is only held while the body is produced: a response whose body
+    # never starts (client gone) holds nothing.
+    executor.check()
 
-    except KeyError as exc:
-        print(exc)
-        answer = {"answer": "Error processing request", "action": ""}
+    async def ndjson():
+        with executor.admit(force=True):
+            chunk_size = settings.CHAT_BATCH_STREAM_CHUNK
+            for start in range(0, len(queries), chunk_size):
+                chunk = queries[start : start + chunk_size]
+                results = await executor.run(_resolve_batch, chunk)
+                yield "".join(
+                    json.dumps({"index": start + i, **public_answer(answer)}) + "\n"
+                    for i, answer in enumerate(results)
+                )
 
-    return answer
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
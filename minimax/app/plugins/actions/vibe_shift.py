@@ -1,4 +1,4 @@
-import json
+from minimax.app.services.actions import VibeShift, decode_action
 
 
 def process_vibe_shift(vibe_data):
@@ -6,12 +6,14 @@ def process_vibe_shift(vibe_data):
     Process vibe shift data containing vibe, lights and sound settings.
 
     Args:
-        vibe_data (dict): Dictionary containing vibe, lights and sound values
+        vibe_data (VibeShift): Decoded vibe shift payload; raw JSON or msgpack
+            bytes/str are decoded first
     """
-    vibe_data = json.loads(vibe_data)
-    print(f"Shifting vibe: {vibe_data['vibe']}")
-    print(f"Shifting lights: {vibe_data['lights']}")
-    print(f"Shifting sound: {vibe_data['sound']}")
+    if not isinstance(vibe_data, VibeShift):
+        vibe_data = decode_action("external/intents/vibe_shift", vibe_data)
+    print(f"Shifting vibe: {vibe_data.vibe}")
+    print(f"Shifting lights: {vibe_data.lights}")
+    print(f"Shifting sound: {vibe_data.sound}")
 
     # TODO: Implement vibe shift logic
     # 1. Change vibe
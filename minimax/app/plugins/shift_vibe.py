@@ -1,5 +1,8 @@
 # app/plugins/temp_sensor.py
 from minimax.app.plugins.actions.vibe_shift import process_vibe_shift
+from minimax.app.services.actions import action_decoder
+
+TOPIC = "external/intents/vibe_shift"
 
 
 def register(mqtt_client):
@@ -7,14 +10,14 @@ def register(mqtt_client):
     This plugin subscribes to the external/intents/vibe_shift topic and processes the message.
     """
     print("yes it works Registering lights effector plugin")
-    mqtt_client.subscribe("external/intents/vibe_shift")
-    print("yes it works Subscribed to external/intents/vibe_shift")
 
     def callback(client, userdata, message):
-        print(f"yes it works [TempSensor] Received: {message.payload.decode()}")
-        process_vibe_shift(message.payload.decode())
+        # Decoded into a VibeShift on the dispatcher, not the network thread
+        print(f"yes it works [TempSensor] Received: {message.payload}")
+        process_vibe_shift(message.payload)
 
-    mqtt_client.message_callback_add("external/intents/vibe_shift", callback)
+    mqtt_client.route(TOPIC, callback, decoder=action_decoder(TOPIC))
+    print("yes it works Subscribed to external/intents/vibe_shift")
 
 
 # todo:
@@ -0,0 +1,186 @@
+import argparse
+import statistics
+import tempfile
+import time
+import lancedb
+import numpy as np
+import pyarrow as pa
+from minimax.app.core.config import settings
+from minimax.app.scripts.init_mini_max import (
+    EMBEDDING_DIM,
+    QA_SCHEMA,
+    build_record_batch,
+)
+from minimax.app.services.vector_index import lancedb_search
+
+TEMPLATES = [
+    "turn {} the {} lights",
+    "set the {} to {}",
+    "what is the {} in the {}",
+    "play {} in the {}",
+    "remind me to {} at {}",
+]
+
+
+def generated_questions(start, count):
+    return [
+        {
+            "question": TEMPLATES[i % len(TEMPLATES)].format(f"w{i % 997}", f"r{i}"),
+            "answer": f"answer {i}",
+            "action": "",
+        }
+        for i in range(start, start + count)
+    ]
+
+
+def clustered_vectors(rng, centers, count):
+    """Unit vectors scattered around topic centers, like real intent embeddings."""
+    picks = rng.integers(0, len(centers), count)
+    vectors = centers[picks] + 0.35 * rng.standard_normal((count, EMBEDDING_DIM))
+    vectors = vectors.astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def build_corpus(table, rows, centers, queries, k, chunk_size, seed=2):
+    """
+    Writes `rows` generated questions chunk by chunk and keeps the exact top-k
+    for every query as it goes, so the corpus never has to fit in memory.
+    """
+    rng = np.random.default_rng(seed)
+    best_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+    best_ids = np.zeros((len(queries), k), dtype=np.int64)
+    for start in range(0, rows, chunk_size):
+        count = min(chunk_size, rows - start)
+        vectors = clustered_vectors(rng, centers, count)
+        texts = generated_questions(start, count)
+        table.add(pa.Table.from_batches([build_record_batch(texts, vectors)]))
+
+        scores = np.concatenate([best_scores, queries @ vectors.T], axis=1)
+        chunk_ids = np.broadcast_to(
+            np.arange(start, start + count), (len(queries), count)
+        )
+        ids = np.concatenate([best_ids, chunk_ids], axis=1)
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        best_scores = np.take_along_axis(scores, top, axis=1)
+        best_ids = np.take_along_axis(ids, top, axis=1)
+        print(f"  wrote {start + count}/{rows} rows", end="\r")
+    print()
+    return [{f"answer {i}" for i in row} for row in best_ids]
+
+
+def measure(table, queries, exact, k, nprobes=None, refine_factor=None, flat=False):
+    timings, recalls = [], []
+    for query, expected in zip(queries, exact):
+        start = time.perf_counter()
+        if flat:
+            results = (
+                table.search(query, vector_column_name="content_embedding")
+                .bypass_vector_index()
+                .limit(k)
+                .to_list()
+            )
+        else:
+            results = lancedb_search(table, query, k, nprobes, refine_factor)
+        timings.append((time.perf_counter() - start) * 1000)
+        found = {row["metadata"]["use_cases"]["chatbot"]["answer"] for row in results}
+        recalls.append(len(found & expected) / k)
+    timings.sort()
+    return (
+        statistics.mean(recalls),
+        statistics.median(timings),
+        timings[int(len(timings) * 0.95) - 1],
+    )
+
+
+def run(
+    rows=1_000_000,
+    queries=100,
+    k=10,
+    nprobes=(5, 10, 20, 50),
+    refine_factors=(0, 5, 10),
+    index_type=None,
+    partitions=None,
+    sub_vectors=None,
+    chunk_size=50_000,
+    path=None,
+):
+    """
+    Recall@k against exact search versus query latency for an ANN index on a
+    synthetic corpus of generated questions, across nprobes/refine_factor.
+    Index parameters default to the ANN_* settings.
+    """
+    index_type = index_type or settings.ANN_INDEX_TYPE
+    partitions = partitions or settings.ANN_NUM_PARTITIONS or int(rows**0.5)
+    sub_vectors = sub_vectors or settings.ANN_NUM_SUB_VECTORS or None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = lancedb.connect(path or tmp)
+        table = db.create_table("bench_ann", schema=QA_SCHEMA, mode="overwrite")
+
+        rng = np.random.default_rng(0)
+        centers = rng.standard_normal((2048, EMBEDDING_DIM)).astype(np.float32)
+        # Queries near the same topic centers, generated before the corpus so
+        # exact results can be accumulated while writing
+        query_vectors = clustered_vectors(rng, centers, queries)
+        print(f"Generating {rows} questions...")
+        exact = build_corpus(table, rows, centers, query_vectors, k, chunk_size)
+
+        recall, p50, p95 = measure(table, query_vectors, exact, k, flat=True)
+        print(
+            f"{'flat scan':>24}: recall {recall:.3f}, "
+            f"p50 {p50:8.2f} ms, p95 {p95:8.2f} ms"
+        )
+
+        print(f"Building {index_type} ({partitions} partitions)...")
+        start = time.perf_counter()
+        options = {"num_sub_vectors": sub_vectors} if index_type.endswith("PQ") else {}
+        table.create_index(
+            metric="l2",
+            vector_column_name="content_embedding",
+            index_type=index_type,
+            num_partitions=partitions,
+            **options,
+        )
+        print(f"Index built in {time.perf_counter() - start:.1f} s")
+
+        for probes in nprobes:
+            for refine in refine_factors:
+                recall, p50, p95 = measure(
+                    table, query_vectors, exact, k, probes, refine
+                )
+                label = f"nprobes={probes} refine={refine}"
+                print(
+                    f"{label:>24}: recall {recall:.3f}, "
+                    f"p50 {p50:8.2f} ms, p95 {p95:8.2f} ms"
+                )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=run.__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--nprobes", type=int, nargs="+", default=[5, 10, 20, 50])
+    parser.add_argument("--refine", type=int, nargs="+", default=[0, 5, 10])
+    parser.add_argument(
+        "--index-type",
+        choices=["IVF_PQ", "IVF_HNSW_PQ", "IVF_HNSW_SQ", "IVF_FLAT"],
+    )
+    parser.add_argument("--partitions", type=int)
+    parser.add_argument("--sub-vectors", type=int)
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--path", help="keep the corpus in this LanceDB dir")
+    args = parser.parse_args()
+    run(
+        args.rows,
+        args.queries,
+        args.k,
+        args.nprobes,
+        args.refine,
+        args.index_type,
+        args.partitions,
+        args.sub_vectors,
+        args.chunk_size,
+        args.path,
+    )
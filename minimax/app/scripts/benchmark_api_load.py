@@ -0,0 +1,85 @@
+import argparse
+import asyncio
+import time
+import httpx
+import numpy as np
+
+
+async def _client(client, url, space, deadline, queries, latencies, statuses):
+    while time.perf_counter() < deadline:
+        # Distinct text each time, so the answer cache does not serve it
+        content = f"turn the lights to color number {next(queries)}"
+        start = time.perf_counter()
+        try:
+            response = await client.post(url, json={"content": content, "space": space})
+            status = response.status_code
+        except httpx.HTTPError:
+            status = "error"
+        latencies.append((time.perf_counter() - start) * 1000)
+        statuses[status] = statuses.get(status, 0) + 1
+        if status == 503:
+            # Honour the hint, capped so a short run still measures something
+            retry_after = float(response.headers.get("Retry-After", 1))
+            await asyncio.sleep(min(retry_after, 0.5))
+
+
+async def _level(url, space, concurrency, seconds, timeout):
+    latencies, statuses = [], {}
+    queries = iter(range(10**12))
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        deadline = time.perf_counter() + seconds
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(
+                _client(client, url, space, deadline, queries, latencies, statuses)
+                for _ in range(concurrency)
+            )
+        )
+        elapsed = time.perf_counter() - start
+    return latencies, statuses, elapsed
+
+
+def run(url, space, levels, seconds, timeout):
+    """
+    Runs closed-loop clients against the chat endpoint at each concurrency
+    level and reports throughput, latency percentiles and how many requests
+    were shed with a 503. Past the server's worker count p50 should stay
+    flat and p99 bounded, with the excess rejected rather than queued.
+    """
+    print(f"{url}, space {space!r}, {seconds:.0f} s per level")
+    for concurrency in levels:
+        latencies, statuses, elapsed = asyncio.run(
+            _level(url, space, concurrency, seconds, timeout)
+        )
+        ok = statuses.get(200, 0)
+        shed = statuses.get(503, 0)
+        other = sum(statuses.values()) - ok - shed
+        p50, p95, p99 = np.percentile(latencies or [0.0], [50, 95, 99])
+        print(
+            f"{concurrency:>4} clients: {ok / elapsed:7.1f} ok/s, "
+            f"p50 {p50:7.1f} ms, p95 {p95:7.1f} ms, p99 {p99:7.1f} ms, "
+            f"max {max(latencies, default=0):7.1f} ms, 503 {shed}, other {other}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=run.__doc__)
+    parser.add_argument("--url", default="http://localhost:8000/api/text/chat/")
+    parser.add_argument("--space", default="chatbot")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        action="append",
+        help="concurrent clients, repeatable (default: 1 4 16 64 256)",
+    )
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args()
+    run(
+        args.url,
+        args.space,
+        args.concurrency or [1, 4, 16, 64, 256],
+        args.seconds,
+        args.timeout,
+    )
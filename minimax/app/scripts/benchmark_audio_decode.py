@@ -0,0 +1,58 @@
+import argparse
+import statistics
+import time
+import numpy as np
+from minimax.app.stt.src.audio import ffmpeg_decode, pcm16_to_float32
+from minimax.app.stt.src.capture import SAMPLE_RATE, iter_wav_segments
+
+
+def _synthetic_utterances(count, seconds):
+    rng = np.random.default_rng(0)
+    return [
+        (rng.standard_normal(int(SAMPLE_RATE * seconds)) * 3000).astype(np.int16)
+        for _ in range(count)
+    ]
+
+
+def _time_ms(fn, utterances):
+    timings = []
+    for utterance in utterances:
+        start = time.perf_counter()
+        fn(utterance)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def run(wav=None, count=50, seconds=2.0):
+    """
+    Compares per-utterance preprocessing latency of the ffmpeg subprocess
+    round-trip against the in-process int16 to float32 conversion.
+    """
+    if wav:
+        utterances = list(iter_wav_segments(wav))
+    else:
+        utterances = _synthetic_utterances(count, seconds)
+    print(f"{len(utterances)} utterances")
+
+    ffmpeg_timings = _time_ms(lambda u: ffmpeg_decode(u.tobytes()), utterances)
+    in_process_timings = _time_ms(pcm16_to_float32, utterances)
+    for name, timings in (
+        ("ffmpeg", ffmpeg_timings),
+        ("in_process", in_process_timings),
+    ):
+        print(
+            f"{name:>10}: p50 {statistics.median(timings):8.3f} ms, "
+            f"max {max(timings):8.3f} ms"
+        )
+    assert np.array_equal(
+        ffmpeg_decode(utterances[0].tobytes()), pcm16_to_float32(utterances[0])
+    ), "decode paths disagree"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=run.__doc__)
+    parser.add_argument("--wav", help="16 kHz mono WAV to segment into utterances")
+    parser.add_argument("--count", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+    run(args.wav, args.count, args.seconds)
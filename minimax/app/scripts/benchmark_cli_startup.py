@@ -0,0 +1,52 @@
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+LIGHT_COMMANDS = [["--version"], ["--help"], ["status", "--help"], ["stop", "--help"]]
+
+
+def time_command(args, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-m", "minimax.cli", *args],
+            check=True,
+            capture_output=True,
+        )
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def run(runs=5, budget_ms=300.0):
+    """
+    Times lightweight CLI commands in fresh interpreters and fails if any of
+    them exceeds the budget, which catches heavy imports creeping back into
+    minimax/cli.py.
+    """
+    over_budget = []
+    for args in LIGHT_COMMANDS:
+        timings = time_command(args, runs)
+        median = statistics.median(timings)
+        name = " ".join(args)
+        print(f"minimax {name:<14} p50 {median:7.1f} ms  max {max(timings):7.1f} ms")
+        if median > budget_ms:
+            over_budget.append(name)
+
+    if over_budget:
+        print(f"Over the {budget_ms:.0f} ms budget: {', '.join(over_budget)}")
+        print(
+            f"Run `{sys.executable} -X importtime -m minimax.cli --version` to see why"
+        )
+        return False
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=run.__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=300.0)
+    args = parser.parse_args()
+    sys.exit(0 if run(args.runs, args.budget_ms) else 1)
@@ -0,0 +1,88 @@
+import argparse
+import sys
+import time
+import numpy as np
+from minimax.app.scripts.init_mini_max import iter_all_text
+from minimax.app.services.embedding_backends import BACKENDS
+from minimax.app.services.inference import MODEL_NAME, cache_folder
+
+
+def cosine_rows(a, b):
+    a = np.asarray(a, dtype=np.float32)
+    b = np.asarray(b, dtype=np.float32)
+    return (a * b).sum(axis=1) / (np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1))
+
+
+def run(backends, queries, model_name, threads, tolerance):
+    """
+    Embeds the init file's questions with each backend and reports cosine
+    agreement with the float32 torch model plus queries per second, one
+    query per call (as the chat endpoint mostly sees) and all in one call
+    (as ingest does). Returns the backends whose worst agreement falls below
+    the tolerance.
+    """
+    print(f"{len(queries)} queries, model {model_name}, threads {threads or 'default'}")
+    reference_backend = BACKENDS["torch"](model_name, cache_folder, threads)
+    reference = reference_backend.encode(queries)
+
+    failed = []
+    for name in backends:
+        if name == "torch":
+            backend = reference_backend
+        else:
+            backend = BACKENDS[name](model_name, cache_folder, threads)
+        # Warm up kernels and allocator before timing
+        backend.encode(queries[:8])
+
+        start = time.perf_counter()
+        for query in queries:
+            backend.encode([query])
+        single_qps = len(queries) / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        vectors = backend.encode(queries)
+        batch_qps = len(queries) / (time.perf_counter() - start)
+
+        agreement = cosine_rows(reference, vectors)
+        ok = agreement.min() >= tolerance
+        if not ok:
+            failed.append(name)
+        print(
+            f"{name:>10}: cosine min {agreement.min():.5f} "
+            f"mean {agreement.mean():.5f} {'ok' if ok else 'BELOW TOLERANCE'}, "
+            f"{single_qps:.0f} q/s single, {batch_qps:.0f} q/s batched"
+        )
+    return failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=run.__doc__)
+    parser.add_argument(
+        "--backend",
+        action="append",
+        choices=list(BACKENDS),
+        help="backend to benchmark, repeatable (default: all)",
+    )
+    parser.add_argument("--init-file", help="CSV of questions (default: INIT_FILE)")
+    parser.add_argument("--limit", type=int, default=1000)
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.99,
+        help="lowest acceptable cosine similarity to the float32 embedding",
+    )
+    args = parser.parse_args()
+    queries = [row["question"] for row in iter_all_text(args.init_file)]
+    queries = queries[: args.limit]
+    failed = run(
+        args.backend or list(BACKENDS),
+        queries,
+        args.model,
+        args.threads,
+        args.tolerance,
+    )
+    if failed:
+        print(f"Below tolerance {args.tolerance}: {', '.join(failed)}")
+        sys.exit(1)
@@ -0,0 +1,68 @@
+import argparse
+import asyncio
+import statistics
+import time
+from minimax.app.services.inference import EmbeddingBatcher, get_text_embeddings
+
+
+async def _run_unbatched(texts, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(text):
+        async with semaphore:
+            start = time.perf_counter()
+            await asyncio.to_thread(get_text_embeddings, [text])
+            return (time.perf_counter() - start) * 1000
+
+    return await asyncio.gather(*(one(text) for text in texts))
+
+
+async def _run_batched(texts, concurrency, max_batch_size, max_wait_ms):
+    batcher = await EmbeddingBatcher(
+        max_batch_size=max_batch_size, max_wait_ms=max_wait_ms
+    ).start()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(text):
+        async with semaphore:
+            start = time.perf_counter()
+            await batcher.embed(text)
+            return (time.perf_counter() - start) * 1000
+
+    try:
+        return await asyncio.gather(*(one(text) for text in texts))
+    finally:
+        print(f"batcher stats: {batcher.stats()}")
+        await batcher.stop()
+
+
+def run(requests=256, concurrency=16, max_batch_size=32, max_wait_ms=2.0):
+    """
+    Compare throughput and latency of one encode per query against the
+    micro-batcher under concurrent load.
+    """
+    texts = [f"turn the lights to color number {i}" for i in range(requests)]
+    get_text_embeddings(["warm up"])
+    for name, coro in (
+        ("per_request", _run_unbatched(texts, concurrency)),
+        ("batched", _run_batched(texts, concurrency, max_batch_size, max_wait_ms)),
+    ):
+        start = time.perf_counter()
+        latencies = asyncio.run(coro)
+        elapsed = time.perf_counter() - start
+        latencies.sort()
+        print(
+            f"{name:>12}: {requests / elapsed:.1f} queries/s, "
+            f"p50 {statistics.median(latencies):.1f} ms, "
+            f"p95 {latencies[int(len(latencies) * 0.95) - 1]:.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=run.__doc__)
+    parser.add_argument("--requests", type=int, default=256)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    args = parser.parse_args()
+    run(args.requests, args.concurrency, args.max_batch_size, args.max_wait_ms)
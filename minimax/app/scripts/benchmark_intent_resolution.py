@@ -0,0 +1,58 @@
+import argparse
+import statistics
+import time
+import requests
+from minimax.app.core.config import settings
+from minimax.app.stt.src.main import resolve_intent_http, resolve_intent_in_process
+
+COMMANDS = [
+    "hi how are you",
+    "what's up",
+    "what's your name",
+    "turn the lights blue",
+]
+
+
+def new_connection(text):
+    """The previous behaviour: a fresh TCP connection per command."""
+    return requests.post(
+        settings.STT_API_URL, json={"space": "chatbot", "content": text}
+    ).json()
+
+
+def run(iterations=100, modes=("new_connection", "http", "in_process")):
+    """
+    Measures end-to-end command latency for each way the STT worker can
+    resolve an intent. The HTTP modes need the API running.
+    """
+    resolvers = {
+        "new_connection": new_connection,
+        "http": resolve_intent_http,
+        "in_process": resolve_intent_in_process,
+    }
+    for mode in modes:
+        resolve = resolvers[mode]
+        resolve(COMMANDS[0])  # warm up connections and models
+        timings = []
+        for i in range(iterations):
+            start = time.perf_counter()
+            resolve(COMMANDS[i % len(COMMANDS)])
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        print(
+            f"{mode:>15}: p50 {statistics.median(timings):7.2f} ms, "
+            f"p95 {timings[int(len(timings) * 0.95) - 1]:7.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=run.__doc__)
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument(
+        "--mode",
+        action="append",
+        choices=["new_connection", "http", "in_process"],
+        help="mode to benchmark, repeatable (default: all)",
+    )
+    args = parser.parse_args()
+    run(args.iterations, args.mode or ("new_connection", "http", "in_process"))
@@ -0,0 +1,134 @@
+import argparse
+import socket
+import socketserver
+import threading
+import time
+import paho.mqtt.client as mqtt
+from minimax.mqtt_publisher import MQTTPublisher
+
+CONNECT, CONNACK, PUBLISH, PUBACK = 1, 2, 3, 4
+SUBSCRIBE, SUBACK, PINGREQ, PINGRESP, DISCONNECT = 8, 9, 12, 13, 14
+
+
+def _read_exact(sock, size):
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("client closed")
+        data += chunk
+    return data
+
+
+def _read_packet(sock):
+    header = _read_exact(sock, 1)[0]
+    length, multiplier = 0, 1
+    while True:
+        byte = _read_exact(sock, 1)[0]
+        length += (byte & 0x7F) * multiplier
+        multiplier *= 128
+        if not byte & 0x80:
+            break
+    return header >> 4, header & 0x0F, _read_exact(sock, length)
+
+
+class _BrokerHandler(socketserver.BaseRequestHandler):
+    """Just enough MQTT 3.1.1 to accept connections and acknowledge publishes."""
+
+    def handle(self):
+        sock = self.request
+        try:
+            while True:
+                packet_type, flags, body = _read_packet(sock)
+                if packet_type == CONNECT:
+                    sock.sendall(bytes([CONNACK << 4, 2, 0, 0]))
+                elif packet_type == PUBLISH:
+                    self.server.received += 1
+                    qos = (flags >> 1) & 0x03
+                    if qos:
+                        topic_length = int.from_bytes(body[:2], "big")
+                        packet_id = body[2 + topic_length : 4 + topic_length]
+                        sock.sendall(bytes([PUBACK << 4, 2]) + packet_id)
+                elif packet_type == SUBSCRIBE:
+                    sock.sendall(bytes([SUBACK << 4, 3]) + body[:2] + b"\x00")
+                elif packet_type == PINGREQ:
+                    sock.sendall(bytes([PINGRESP << 4, 0]))
+                elif packet_type == DISCONNECT:
+                    return
+        except (ConnectionError, OSError):
+            return
+
+
+class FakeBroker(socketserver.ThreadingTCPServer):
+    """In-process broker for benchmarks when no mosquitto is available."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, port=0):
+        super().__init__(("127.0.0.1", port), _BrokerHandler)
+        self.received = 0
+        self.port = self.server_address[1]
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+
+def connect_per_message(host, port, count, qos):
+    """The previous publish_message: connect, publish, disconnect every time."""
+    for i in range(count):
+        client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
+        client.connect(host, port, 60)
+        client.publish("bench/connect_per_message", str(i), qos)
+        client.disconnect()
+
+
+def pooled(host, port, count, qos):
+    publisher = MQTTPublisher(host, port, qos=qos)
+    publisher.wait_until_connected(5)
+    infos = [publisher.publish("bench/pooled", str(i)) for i in range(count)]
+    for info in infos:
+        info.wait_for_publish(10)
+    publisher.close()
+
+
+def pooled_batch(host, port, count, qos):
+    publisher = MQTTPublisher(host, port, qos=qos)
+    publisher.wait_until_connected(5)
+    publisher.publish_many(
+        (("bench/pooled_batch", str(i)) for i in range(count)), timeout=10
+    )
+    publisher.close()
+
+
+def run(host=None, port=1883, count=500, qos=1):
+    """
+    Messages per second for connect-per-message publishing against the pooled
+    publisher, on a real broker or, without --host, an in-process fake one.
+    """
+    broker = None
+    if host is None:
+        broker = FakeBroker()
+        host, port = "127.0.0.1", broker.port
+
+    for name, publish in (
+        ("connect_per_message", connect_per_message),
+        ("pooled", pooled),
+        ("pooled_batch", pooled_batch),
+    ):
+        start = time.perf_counter()
+        publish(host, port, count, qos)
+        elapsed = time.perf_counter() - start
+        print(f"{name:>20}: {count / elapsed:10.1f} msg/s")
+
+    if broker is not None:
+        print(f"fake broker received {broker.received} messages")
+        broker.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=run.__doc__)
+    parser.add_argument("--host", help="real broker host (default: in-process fake)")
+    parser.add_argument("--port", type=int, default=1883)
+    parser.add_argument("--count", type=int, default=500)
+    parser.add_argument("--qos", type=int, default=1, choices=[0, 1])
+    args = parser.parse_args()
+    run(args.host, args.port, args.count, args.qos)
@@ -0,0 +1,115 @@
+import argparse
+import random
+import time
+from minimax.mqtt_router import TopicRouter
+
+CAPABILITIES = ["lights", "sound", "climate", "blinds", "locks", "media", "vibe"]
+VERBS = ["set", "toggle", "on", "off", "dim", "play", "stop", "status"]
+
+
+def build_filters(count, seed=0):
+    """
+    Filters in the planned internal/commands/<capability>/<unit>/<verb> and
+    internal/state/... hierarchy: mostly literal, some with + and #, and a few
+    shared subscriptions.
+    """
+    rng = random.Random(seed)
+    filters = []
+    for i in range(count):
+        kind = rng.choice(["commands", "state", "policy"])
+        capability = rng.choice(CAPABILITIES)
+        unit = f"unit{i}"
+        verb = rng.choice(VERBS)
+        roll = rng.random()
+        if roll < 0.7:
+            topic_filter = f"internal/{kind}/{capability}/{unit}/{verb}"
+        elif roll < 0.85:
+            topic_filter = f"internal/{kind}/{capability}/{unit}/+"
+        elif roll < 0.95:
+            topic_filter = f"internal/{kind}/+/{unit}/{verb}"
+        else:
+            topic_filter = f"internal/{kind}/{capability}/{unit}/#"
+        if rng.random() < 0.05:
+            topic_filter = f"$share/workers/{topic_filter}"
+        filters.append(topic_filter)
+    return filters
+
+
+def build_topics(count, filters, seed=1):
+    """Mostly topics some route was written for, plus a share nobody handles."""
+    rng = random.Random(seed)
+    topics = []
+    for _ in range(count):
+        levels = rng.choice(filters).split("/")
+        if levels[0] == "$share":
+            levels = levels[2:]
+        levels = [
+            rng.choice(CAPABILITIES) if level == "+" else level for level in levels
+        ]
+        if levels[-1] == "#":
+            levels[-1] = rng.choice(VERBS)
+        if rng.random() < 0.2:
+            levels[-1] = "unhandled"
+        topics.append("/".join(levels))
+    return topics
+
+
+def _matches(levels, topic_levels):
+    for index, level in enumerate(levels):
+        if level == "#":
+            return True
+        if index >= len(topic_levels):
+            return False
+        if level != "+" and level != topic_levels[index]:
+            return False
+    return len(levels) == len(topic_levels)
+
+
+def linear_match(filters, topic):
+    """What per-callback filter matching costs: every filter is checked."""
+    topic_levels = topic.split("/")
+    return ["/".join(levels) for levels in filters if _matches(levels, topic_levels)]
+
+
+def run(routes=5000, messages=20000):
+    """
+    Lookups per second for the topic trie against checking every filter in
+    turn, with thousands of routes in the planned command/state hierarchy.
+    """
+    filters = build_filters(routes)
+    topics = build_topics(messages, filters)
+    router = TopicRouter()
+    for topic_filter in filters:
+        router.add(topic_filter, lambda client, userdata, message: None)
+    split_filters = [route.levels for route in router.routes]
+
+    # Both must agree before timing anything
+    for topic in topics[:200]:
+        expected = sorted(linear_match(split_filters, topic))
+        got = sorted("/".join(route.levels) for route in router.match(topic))
+        assert got == expected, (topic, got, expected)
+
+    linear_topics = topics[: max(messages // 20, 1)]
+    start = time.perf_counter()
+    for topic in linear_topics:
+        linear_match(split_filters, topic)
+    linear = len(linear_topics) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    matched = 0
+    for topic in topics:
+        matched += len(router.match(topic))
+    trie = len(topics) / (time.perf_counter() - start)
+
+    print(f"{routes} routes, {matched / len(topics):.2f} matches per message")
+    print(f"{'linear':>8}: {linear:12.0f} lookups/s ({1e6 / linear:8.1f} us each)")
+    print(f"{'trie':>8}: {trie:12.0f} lookups/s ({1e6 / trie:8.1f} us each)")
+    print(f"Speedup: {trie / linear:.0f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=run.__doc__)
+    parser.add_argument("--routes", type=int, default=5000)
+    parser.add_argument("--messages", type=int, default=20000)
+    args = parser.parse_args()
+    run(args.routes, args.messages)
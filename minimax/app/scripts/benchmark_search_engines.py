@@ -0,0 +1,79 @@
+import argparse
+import statistics
+import tempfile
+import time
+import lancedb
+import numpy as np
+import pyarrow as pa
+from minimax.app.scripts.init_mini_max import (
+    EMBEDDING_DIM,
+    QA_SCHEMA,
+    build_record_batch,
+)
+from minimax.app.services.vector_index import NumpyIndex, lancedb_search
+
+
+def synthetic_table(db, rows, rng):
+    """A table in the init_qa_action schema filled with random unit vectors."""
+    vectors = rng.standard_normal((rows, EMBEDDING_DIM)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    texts = [
+        {"question": f"question {i}", "answer": f"answer {i}", "action": ""}
+        for i in range(rows)
+    ]
+    table = db.create_table(f"bench_{rows}", schema=QA_SCHEMA, mode="overwrite")
+    table.add(pa.Table.from_batches([build_record_batch(texts, vectors)]))
+    return table, vectors
+
+
+def _time_ms(fn, queries):
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(query)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def run(sizes=(100, 1000, 10000, 50000), queries=200, k=1):
+    """
+    Per-query latency of LanceDB search with .to_list() against the in-memory
+    NumPy index, for several table sizes. Both must return the same top hit.
+    """
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as path:
+        db = lancedb.connect(path)
+        for size in sizes:
+            table, vectors = synthetic_table(db, size, rng)
+            start = time.perf_counter()
+            index = NumpyIndex(table)
+            build_ms = (time.perf_counter() - start) * 1000
+
+            # Queries near stored rows, like real repeated commands
+            picks = rng.integers(0, size, queries)
+            noise = rng.standard_normal((queries, EMBEDDING_DIM)).astype(np.float32)
+            query_vectors = vectors[picks] + 0.05 * noise
+
+            for query in query_vectors[:20]:
+                expected = lancedb_search(table, query, k)[0]["content"]
+                assert index.search(query, k)[0]["content"] == expected
+
+            lance = _time_ms(lambda q: lancedb_search(table, q, k), query_vectors)
+            numpy = _time_ms(lambda q: index.search(q, k), query_vectors)
+            print(
+                f"{size:>7} rows: lancedb p50 {statistics.median(lance):7.3f} ms, "
+                f"numpy p50 {statistics.median(numpy):7.3f} ms "
+                f"({statistics.median(lance) / statistics.median(numpy):5.1f}x), "
+                f"index build {build_ms:7.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=run.__doc__)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[100, 1000, 10000, 50000]
+    )
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=1)
+    args = parser.parse_args()
+    run(args.sizes, args.queries, args.k)
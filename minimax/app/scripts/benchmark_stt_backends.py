@@ -0,0 +1,91 @@
+import argparse
+import re
+import time
+import wave
+from pathlib import Path
+import numpy as np
+from minimax.app.stt.src.audio import pcm16_to_float32
+from minimax.app.stt.src.backends import BACKENDS, get_stt_backend
+from minimax.app.stt.src.capture import SAMPLE_RATE
+
+
+def normalize_words(text):
+    return re.sub(r"[^a-z0-9' ]+", " ", text.lower()).split()
+
+
+def word_error_rate(reference, hypothesis):
+    """Word-level Levenshtein distance divided by the reference length."""
+    ref, hyp = normalize_words(reference), normalize_words(hypothesis)
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hyp, 1):
+            current.append(
+                min(
+                    previous[j] + 1,
+                    current[j - 1] + 1,
+                    previous[j - 1] + (ref_word != hyp_word),
+                )
+            )
+        previous = current
+    return previous[-1] / max(len(ref), 1)
+
+
+def load_wav(path):
+    with wave.open(str(path), "rb") as wav:
+        if wav.getframerate() != SAMPLE_RATE or wav.getnchannels() != 1:
+            raise ValueError(f"{path} must be mono at {SAMPLE_RATE} Hz")
+        return pcm16_to_float32(wav.readframes(wav.getnframes()))
+
+
+def run(folder, backends, model_size, threads):
+    """
+    Transcribes every WAV in a folder with each backend and reports real-time
+    factor (decode time / audio time) and word error rate against the
+    transcript in the matching .txt file, when there is one.
+    """
+    clips = []
+    for path in sorted(Path(folder).glob("*.wav")):
+        reference = path.with_suffix(".txt")
+        clips.append(
+            (
+                path.name,
+                load_wav(path),
+                reference.read_text().strip() if reference.exists() else None,
+            )
+        )
+    print(f"{len(clips)} clips from {folder}")
+
+    for name in backends:
+        backend = get_stt_backend(name, model_size, threads)
+        decode_seconds = audio_seconds = 0.0
+        errors = []
+        for clip_name, audio, reference in clips:
+            start = time.perf_counter()
+            transcript = backend.transcribe(audio)
+            decode_seconds += time.perf_counter() - start
+            audio_seconds += len(audio) / SAMPLE_RATE
+            if reference is not None:
+                errors.append(word_error_rate(reference, transcript.text))
+        wer = f"{np.mean(errors):.3f}" if errors else "n/a"
+        print(
+            f"{name:>15}: RTF {decode_seconds / audio_seconds:.3f}, WER {wer}, "
+            f"{decode_seconds:.2f} s for {audio_seconds:.1f} s of audio"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=run.__doc__)
+    parser.add_argument(
+        "folder", help="folder of 16 kHz mono WAVs with .txt references"
+    )
+    parser.add_argument(
+        "--backend",
+        action="append",
+        choices=list(BACKENDS),
+        help="backend to benchmark, repeatable (default: all)",
+    )
+    parser.add_argument("--model-size", default="base")
+    parser.add_argument("--threads", type=int, default=0)
+    args = parser.parse_args()
+    run(args.folder, args.backend or list(BACKENDS), args.model_size, args.threads)
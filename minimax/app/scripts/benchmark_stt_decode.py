@@ -0,0 +1,59 @@
+import argparse
+import statistics
+import time
+import torch
+import whisper
+from minimax.app.stt.src.audio import pcm16_to_float32
+from minimax.app.stt.src.capture import iter_wav_segments
+from minimax.app.stt.src.decode import decode_utterance
+
+
+def padded_decode(model, audio, language="en"):
+    """The original path: pad to 30 s, full log-mel, default decoding options."""
+    mel = whisper.log_mel_spectrogram(whisper.pad_or_trim(audio), model.dims.n_mels).to(
+        model.device
+    )
+    options = whisper.DecodingOptions(language=language, fp16=False)
+    with torch.no_grad():
+        return whisper.decode(model, mel, options)
+
+
+def _measure(decode, model, utterances):
+    cpu, wall, texts = [], [], []
+    for audio in utterances:
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        texts.append(decode(model, audio).text)
+        cpu.append((time.process_time() - cpu_start) * 1000)
+        wall.append((time.perf_counter() - wall_start) * 1000)
+    return cpu, wall, texts
+
+
+def run(wav, model_name="base"):
+    """
+    Segments a 16 kHz mono WAV with the live capture path and compares CPU
+    time per voice command between the padded and short-utterance decoders.
+    """
+    model = whisper.load_model(model_name, device="cpu")
+    utterances = [pcm16_to_float32(segment) for segment in iter_wav_segments(wav)]
+    print(f"{len(utterances)} utterances from {wav}")
+    decode_utterance(model, utterances[0])  # warm up
+
+    results = {}
+    for name, decode in (("padded", padded_decode), ("short", decode_utterance)):
+        cpu, wall, texts = _measure(decode, model, utterances)
+        results[name] = texts
+        print(
+            f"{name:>7}: cpu p50 {statistics.median(cpu):8.1f} ms, "
+            f"wall p50 {statistics.median(wall):8.1f} ms, "
+            f"wall total {sum(wall) / 1000:6.2f} s"
+        )
+    same = sum(a == b for a, b in zip(results["padded"], results["short"]))
+    print(f"identical transcripts: {same}/{len(utterances)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=run.__doc__)
+    parser.add_argument("wav", help="16 kHz mono WAV with one or more commands")
+    parser.add_argument("--model", default="base")
+    args = parser.parse_args()
+    run(args.wav, args.model)
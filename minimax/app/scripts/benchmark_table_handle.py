@@ -0,0 +1,53 @@
+import argparse
+import statistics
+import time
+import lancedb
+from minimax.app.core.config import settings
+from minimax.app.services.database import TableHandle
+
+
+def _time_ms(fn, iterations):
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def run(iterations=200, table_name="init_qa_action"):
+    """
+    Compare the per-request cost of connecting and opening the table on every
+    request against reusing one shared TableHandle.
+    """
+
+    def connect_per_request():
+        db = lancedb.connect(settings.DB_PATH)
+        return db.open_table(table_name)
+
+    handle = TableHandle(
+        settings.DB_PATH, table_name, settings.DB_TABLE_REFRESH_SECONDS
+    ).connect()
+
+    results = {
+        "connect_per_request": _time_ms(connect_per_request, iterations),
+        "shared_handle": _time_ms(handle.get, iterations),
+    }
+    for name, timings in results.items():
+        print(
+            f"{name:>20}: mean {statistics.mean(timings):.3f} ms, "
+            f"p50 {statistics.median(timings):.3f} ms, max {max(timings):.3f} ms"
+        )
+    saved = statistics.mean(results["connect_per_request"]) - statistics.mean(
+        results["shared_handle"]
+    )
+    print(f"Per-request overhead removed: {saved:.3f} ms")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=run.__doc__)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--table", default="init_qa_action")
+    args = parser.parse_args()
+    run(args.iterations, args.table)
@@ -1,5 +1,8 @@
 import csv
+import hashlib
+import itertools
 import lancedb
+import numpy as np
 import os
 import pyarrow as pa
 import sys
@@ -9,130 +12,192 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent.parent.parent
 sys.path.append(str(project_root))
 
-from minimax.app.services.inference import get_text_embeddings
+from minimax.app.services.inference import (
+    get_batch_embeddings,
+    get_embedding_cache,
+    MODEL_NAME,
+)
+from minimax.app.services.actions import ActionPayloadError, compile_action
+from minimax.app.services.database import (
+    QA_TABLE,
+    SPACE_TABLE_PREFIX,
+    list_tables,
+    space_table_name,
+    table_exists,
+)
 from minimax.app.core.config import settings
 
 DB_PATH = settings.DB_PATH
 INIT_FILE = settings.INIT_FILE
+EMBEDDING_DIM = 384
+DEFAULT_SPACE = "chatbot"
 
+CHATBOT_TYPE = pa.struct(
+    [
+        pa.field("answer", pa.string()),
+        pa.field("action", pa.string()),
+        pa.field("message_data", pa.string()),
+        # message_data validated and encoded at ingest, published as-is
+        pa.field("payload", pa.binary()),
+    ]
+)
+USE_CASES_TYPE = pa.struct([pa.field("chatbot", CHATBOT_TYPE)])
+METADATA_TYPE = pa.struct([pa.field("use_cases", USE_CASES_TYPE)])
+
+QA_SCHEMA = pa.schema(
+    [
+        pa.field("content", pa.string()),
+        pa.field("content_embedding", pa.list_(pa.float32(), EMBEDDING_DIM)),
+        pa.field("space", pa.string()),
+        pa.field("model_name", pa.string()),
+        pa.field("metadata", METADATA_TYPE),
+        pa.field("cache", pa.bool_()),
+        pa.field("content_hash", pa.string()),
+    ]
+)
 
-def create_new_data_collection():
-    # Create or connect to a LanceDB database
-    db = lancedb.connect(DB_PATH)
-    # Create a table for init_qa_action if it doesn't exist
-    if "init_qa_action" not in db.table_names():
-        # Create a proper PyArrow schema instead of a dictionary
-        schema = pa.schema(
-            [
-                pa.field("content", pa.string()),
-                pa.field("content_embedding", pa.list_(pa.float32(), 384)),
-                pa.field("space", pa.string()),
-                pa.field("model_name", pa.string()),
-                pa.field(
-                    "metadata",
-                    pa.struct(
-                        [
-                            pa.field(
-                                "use_cases",
-                                pa.struct(
-                                    [
-                                        pa.field(
-                                            "chatbot",
-                                            pa.struct(
-                                                [
-                                                    pa.field("answer", pa.string()),
-                                                    pa.field("action", pa.string()),
-                                                    pa.field(
-                                                        "message_data", pa.string()
-                                                    ),
-                                                ]
-                                            ),
-                                        )
-                                    ]
-                                ),
-                            )
-                        ]
-                    ),
-                ),
-                pa.field("cache", pa.bool_()),
-            ]
-        )
-        db.create_table("init_qa_action", schema=schema)
 
-    print("Data collection 'init_qa_action' created")
-    return "init_qa_action"
+def intent_tables(db):
+    """The shared intent table and every per-space table that exist."""
+    return [
+        name
+        for name in list_tables(db, QA_TABLE)
+        if name == QA_TABLE or name.startswith(SPACE_TABLE_PREFIX)
+    ]
 
 
 def delete_data_collection():
     # Connect to the database
     db = lancedb.connect(DB_PATH)
 
-    # Drop the table if it exists
-    if "init_qa_action" in db.table_names():
-        db.drop_table("init_qa_action")
-        print("Data collection 'init_qa_action' deleted")
-    else:
+    # Drop the shared table and any per-space tables
+    tables = intent_tables(db)
+    for table_name in tables:
+        db.drop_table(table_name)
+        print(f"Data collection '{table_name}' deleted")
+    if not tables:
         print("No data collection to delete")
 
 
-def get_all_text(init_file_path=None):
-    texts = []
+def iter_all_text(init_file_path=None):
+    """Streams rows of the pipe-delimited init file one at a time."""
     # Get the file path from settings, which can be overridden by environment variable
-    csv_file_path = Path(init_file_path) or Path(INIT_FILE)
+    csv_file_path = Path(init_file_path or INIT_FILE)
     print(f"Looking for CSV at: {csv_file_path}")
 
     if not csv_file_path.exists():
         raise FileNotFoundError(f"CSV file not found at {csv_file_path}")
 
     with open(csv_file_path, "r") as f:
-        csv_texts = csv.DictReader(f, delimiter="|")
-        for text in csv_texts:
-            print(text)
-            texts.append(text)
-    return texts
+        yield from csv.DictReader(f, delimiter="|")
 
 
-def save_all_text(data_collection_id, texts):
-    # Connect to the database
-    db = lancedb.connect(DB_PATH)
+def compile_rows(texts):
+    """
+    Validates each row's action and compiles its message_data into the
+    publishable payload. Bad rows (no question, a short row without an
+    answer column, an invalid action) are reported with their line number
+    and left out, so they fail here rather than when the command is spoken.
+    """
+    rejected = 0
+    for line, text in enumerate(texts, start=2):
+        # An empty answer is fine (action-only rows); a missing one is not
+        if not (text.get("question") or "").strip() or text.get("answer") is None:
+            rejected += 1
+            print(f"Rejected row {line}: missing question or answer")
+            continue
+        try:
+            message_data, payload = compile_action(
+                text.get("action"),
+                text.get("message_data"),
+                settings.ACTION_PAYLOAD_ENCODING,
+            )
+        except ActionPayloadError as exc:
+            rejected += 1
+            print(f"Rejected row {line} ({text.get('question')!r}): {exc}")
+            continue
+        action = (text.get("action") or "").strip()
+        yield {
+            **text,
+            "action": action,
+            "message_data": message_data,
+            "payload": payload,
+        }
+    if rejected:
+        print(f"Rejected {rejected} invalid rows")
 
-    # Get the table
-    table = db.open_table(data_collection_id)
 
-    # Prepare data for insertion
-    records = []
-    for text in texts:
-        record = {
-            "content": text["question"],
-            "content_embedding": get_text_embeddings([text["question"]]),
-            "space": "chatbot",
-            "model_name": "use",
-            "metadata": {
-                "use_cases": {
-                    "chatbot": {
-                        "answer": text["answer"],
-                        "action": text["action"],
-                        "message_data": text["message_data"],
-                    }
-                }
-            },
-            "cache": True,
-        }
-        records.append(record)
+def iter_chunks(texts, chunk_size):
+    """Yields lists of at most chunk_size rows from any iterable of rows."""
+    texts = iter(texts)
+    while chunk := list(itertools.islice(texts, chunk_size)):
+        yield chunk
+
+
+def row_space(text):
+    """The optional space column of the init file; "chatbot" when absent."""
+    return (text.get("space") or "").strip() or DEFAULT_SPACE
+
 
-    # Add data to the table
-    if records:
-        table.add(records)
+def content_hash(text):
+    """
+    Hash of everything that ends up in a stored row, including the embedding
+    model and backend (quantized backends give different vectors), so a row
+    only needs re-embedding when this changes.
+    """
+    parts = [
+        MODEL_NAME,
+        settings.EMBED_BACKEND,
+        settings.ACTION_PAYLOAD_ENCODING,
+        row_space(text),
+        text["question"],
+        text["answer"],
+        text.get("action") or "",
+        text.get("message_data") or "",
+    ]
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
 
-    print("Text saved")
 
+def build_record_batch(texts, embeddings):
+    """
+    Builds a columnar RecordBatch in the init_qa_action schema from a chunk of
+    CSV rows and their (len(texts), EMBEDDING_DIM) embedding matrix.
+    """
+    count = len(texts)
+    chatbot = pa.StructArray.from_arrays(
+        [
+            pa.array([text["answer"] for text in texts], pa.string()),
+            pa.array([text.get("action") for text in texts], pa.string()),
+            pa.array([text.get("message_data") for text in texts], pa.string()),
+            pa.array([text.get("payload") for text in texts], pa.binary()),
+        ],
+        fields=list(CHATBOT_TYPE),
+    )
+    use_cases = pa.StructArray.from_arrays([chatbot], fields=list(USE_CASES_TYPE))
+    metadata = pa.StructArray.from_arrays([use_cases], fields=list(METADATA_TYPE))
+    flat_embeddings = pa.array(
+        np.asarray(embeddings, dtype=np.float32).reshape(-1), pa.float32()
+    )
+    return pa.RecordBatch.from_arrays(
+        [
+            pa.array([text["question"] for text in texts], pa.string()),
+            pa.FixedSizeListArray.from_arrays(flat_embeddings, EMBEDDING_DIM),
+            pa.array([row_space(text) for text in texts], pa.string()),
+            pa.array(["use"] * count, pa.string()),
+            metadata,
+            pa.array([True] * count, pa.bool_()),
+            pa.array([content_hash(text) for text in texts], pa.string()),
+        ],
+        schema=QA_SCHEMA,
+    )
 
-def delete_all_text(data_collection_id="init_qa_action"):
+
+def delete_all_text(data_collection_id=QA_TABLE):
     # Connect to the database
     db = lancedb.connect(DB_PATH)
 
     # Get the table and clear it
-    if data_collection_id in db.table_names():
+    if table_exists(db, data_collection_id):
         table = db.open_table(data_collection_id)
         # In LanceDB, we recreate the table to clear it
         schema = table.schema
@@ -143,10 +208,204 @@ def delete_all_text(data_collection_id="init_qa_action"):
         print(f"Table {data_collection_id} does not exist")
 
 
-def initialize(init_file_path=None):
-    data_collection_id = create_new_data_collection()
-    texts = get_all_text(init_file_path)
-    save_all_text(data_collection_id, texts)
+def has_vector_index(table):
+    return any("content_embedding" in index.columns for index in table.list_indices())
+
+
+def ensure_space_index(table):
+    """Bitmap index on space, so space-filtered searches prefilter cheaply."""
+    if not any(index.columns == ["space"] for index in table.list_indices()):
+        table.create_scalar_index("space", index_type="BITMAP")
+
+
+def ensure_vector_index(table):
+    """
+    Builds an ANN index on content_embedding once the table has at least
+    ANN_INDEX_MIN_ROWS rows; below that a flat scan (or the in-memory NumPy
+    index) is faster than probing partitions.
+    """
+    rows = table.count_rows()
+    if rows < settings.ANN_INDEX_MIN_ROWS:
+        return False
+    if has_vector_index(table):
+        return True
+
+    print(f"Building {settings.ANN_INDEX_TYPE} index over {rows} rows...")
+    options = {}
+    if settings.ANN_INDEX_TYPE.endswith("PQ") and settings.ANN_NUM_SUB_VECTORS:
+        # Must divide EMBEDDING_DIM; LanceDB picks one otherwise
+        options["num_sub_vectors"] = settings.ANN_NUM_SUB_VECTORS
+    table.create_index(
+        metric="l2",
+        vector_column_name="content_embedding",
+        index_type=settings.ANN_INDEX_TYPE,
+        # sqrt(rows) partitions unless configured
+        num_partitions=settings.ANN_NUM_PARTITIONS or max(int(rows**0.5), 1),
+        **options,
+    )
+    print("Vector index built")
+    return True
+
+
+def ensure_indexes(table):
+    ensure_space_index(table)
+    ensure_vector_index(table)
+
+
+def rows_by_table(texts):
+    """
+    Groups a chunk of rows by the table that stores them: all of them in
+    init_qa_action with SPACE_STORAGE "shared", one table per space with
+    "table", so a space is searched (and indexed) at its own size however
+    many other spaces the deployment has.
+    """
+    if settings.SPACE_STORAGE != "table":
+        return {QA_TABLE: texts}
+    tables = {}
+    for text in texts:
+        tables.setdefault(space_table_name(row_space(text)), []).append(text)
+    return tables
+
+
+def get_stored_hashes(table):
+    hashes = table.search().select(["content_hash"]).limit(None).to_arrow()
+    return set(hashes.column("content_hash").to_pylist())
+
+
+def leaf_fields(fields, prefix=""):
+    """(dotted name, type) for every non-struct field, nested ones included."""
+    for field in fields:
+        name = prefix + field.name
+        if pa.types.is_struct(field.type):
+            children = [field.type.field(i) for i in range(field.type.num_fields)]
+            yield from leaf_fields(children, name + ".")
+        else:
+            yield name, field.type
+
+
+def has_qa_schema(schema):
+    """
+    Whether a table has every QA_SCHEMA column (content_hash, the encoded
+    payload, ...) with its type. Nullability, field metadata and extra
+    columns are ignored, as LanceDB or a newer writer may differ there.
+    """
+    found = dict(leaf_fields(schema))
+    return all(found.get(name) == type_ for name, type_ in leaf_fields(QA_SCHEMA))
+
+
+class TableSync:
+    """
+    Brings one table in line with the rows fed to it, chunk by chunk, without
+    re-embedding unchanged rows. Rows are keyed by content_hash: new_rows()
+    picks the rows to embed and add, and finish() deletes rows that were
+    never fed. Missing tables are created, and tables created before the
+    current schema are rebuilt once.
+    """
+
+    def __init__(self, db, table_name):
+        self.db = db
+        self.table_name = table_name
+        if table_exists(db, table_name):
+            self.table = db.open_table(table_name)
+            if not has_qa_schema(self.table.schema):
+                print(f"Data collection '{table_name}' has an old schema, rebuilding")
+                db.drop_table(table_name)
+                self.table = db.create_table(table_name, schema=QA_SCHEMA)
+        else:
+            self.table = db.create_table(table_name, schema=QA_SCHEMA)
+        self.stored = get_stored_hashes(self.table)
+        self.seen = set()
+        self.added = 0
+
+    def new_rows(self, texts):
+        rows = []
+        for text in texts:
+            row_hash = content_hash(text)
+            if row_hash in self.seen:
+                continue
+            self.seen.add(row_hash)
+            if row_hash not in self.stored:
+                rows.append(text)
+        return rows
+
+    def append(self, texts, embeddings):
+        batch = build_record_batch(texts, embeddings)
+        self.table.add(pa.Table.from_batches([batch]))
+        self.added += len(texts)
+
+    def finish(self):
+        # Rows are added before any are deleted, so the table never reads as
+        # empty mid-sync
+        stale = self.stored - self.seen
+        for chunk in iter_chunks(sorted(stale), 500):
+            hash_list = ", ".join(f"'{row_hash}'" for row_hash in chunk)
+            self.table.delete(f"content_hash IN ({hash_list})")
+        print(
+            f"Sync of '{self.table_name}' done: {self.added} added, "
+            f"{len(self.seen & self.stored)} unchanged, {len(stale)} removed"
+        )
+        table = self.db.open_table(self.table_name)
+        if (self.added or stale) and table.list_indices():
+            # Fold added and deleted rows into the existing indexes
+            table.optimize()
+            print("Indexes updated")
+        ensure_indexes(table)
+
+
+def drop_stale_tables(db, keep):
+    """Drops intent tables SPACE_STORAGE no longer uses, e.g. removed spaces."""
+    for table_name in intent_tables(db):
+        if table_name not in keep:
+            db.drop_table(table_name)
+            print(f"Data collection '{table_name}' dropped")
+
+
+def sync(init_file_path=None, chunk_size=None):
+    """
+    Brings the intent tables in line with the init file, streaming it in
+    chunks so peak memory stays bounded by chunk_size whatever the layout:
+    each chunk's new rows are embedded with one batched encode and appended
+    to their tables. Tables of spaces no longer in the file (or of the other
+    SPACE_STORAGE layout) are dropped.
+    """
+    chunk_size = chunk_size or settings.INIT_CHUNK_SIZE
+    db = lancedb.connect(DB_PATH)
+    tables = {}
+    if settings.SPACE_STORAGE != "table":
+        # The shared table exists even for an empty init file
+        tables[QA_TABLE] = TableSync(db, QA_TABLE)
+
+    rows = compile_rows(iter_all_text(init_file_path))
+    for chunk in iter_chunks(rows, chunk_size):
+        pending = []
+        for table_name, texts in rows_by_table(chunk).items():
+            if table_name not in tables:
+                tables[table_name] = TableSync(db, table_name)
+            new_rows = tables[table_name].new_rows(texts)
+            if new_rows:
+                pending.append((tables[table_name], new_rows))
+        if not pending:
+            continue
+        embeddings = get_batch_embeddings(
+            [text["question"] for _, texts in pending for text in texts]
+        )
+        offset = 0
+        for table_sync, texts in pending:
+            table_sync.append(texts, embeddings[offset : offset + len(texts)])
+            offset += len(texts)
+
+    added = sum(table_sync.added for table_sync in tables.values())
+    print(f"Text saved: {added} rows")
+    if settings.EMBED_CACHE_ENABLED and added:
+        print(f"Embedding cache: {get_embedding_cache().stats()}")
+    for table_sync in tables.values():
+        table_sync.finish()
+    drop_stale_tables(db, tables)
+
+
+def initialize(init_file_path=None, chunk_size=None):
+    # Every table is created and filled by the same streaming path as sync
+    sync(init_file_path, chunk_size)
     print("Done")
 
 
@@ -0,0 +1,118 @@
+import json
+from typing import Optional
+from pydantic import BaseModel, ValidationError
+
+
+class ActionPayloadError(ValueError):
+    """A CSV row whose action or message_data cannot be published."""
+
+
+class VibeShift(BaseModel):
+    """message_data for external/intents/vibe_shift."""
+
+    vibe: str
+    lights: str
+    sound: str
+
+
+# Typed payloads for known action topics. Other topics only need a JSON object.
+ACTION_TYPES = {
+    "external/intents/vibe_shift": VibeShift,
+}
+
+
+def _msgpack():
+    try:
+        import msgpack
+    except ImportError as exc:
+        raise ImportError(
+            "ACTION_PAYLOAD_ENCODING=msgpack needs `pip install msgpack`"
+        ) from exc
+    return msgpack
+
+
+def encode_payload(data: dict, encoding: str = "json") -> bytes:
+    if encoding == "json":
+        return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode()
+    if encoding == "msgpack":
+        return _msgpack().packb(data)
+    raise ValueError(f"Unknown action payload encoding: {encoding!r}")
+
+
+def decode_payload(payload: bytes):
+    """
+    Decodes either encoding: a JSON object always starts with "{", which is
+    never the first byte of a msgpack map.
+    """
+    if isinstance(payload, str):
+        payload = payload.encode()
+    if not payload:
+        return None
+    if payload[:1] == b"{":
+        return json.loads(payload)
+    return _msgpack().unpackb(payload)
+
+
+def validate_topic(action: str):
+    if "+" in action or "#" in action or "\x00" in action:
+        raise ActionPayloadError(f"action is not a publishable topic: {action!r}")
+
+
+def compile_action(
+    action: Optional[str], message_data: Optional[str], encoding: str = "json"
+):
+    """
+    Validates one row's action at ingest time and returns (message_data,
+    payload): the canonical JSON text and the bytes published as-is at
+    runtime. Rows without an action give ("", None).
+    """
+    action = (action or "").strip()
+    message_data = (message_data or "").strip()
+    if not action:
+        if message_data:
+            raise ActionPayloadError("message_data given without an action")
+        return "", None
+    validate_topic(action)
+    if not message_data:
+        if action in ACTION_TYPES:
+            raise ActionPayloadError(f"{action} needs message_data")
+        return "", b""
+
+    try:
+        data = json.loads(message_data)
+    except json.JSONDecodeError as exc:
+        raise ActionPayloadError(f"message_data is not valid JSON: {exc}") from exc
+    if not isinstance(data, dict):
+        raise ActionPayloadError("message_data must be a JSON object")
+    model = ACTION_TYPES.get(action)
+    if model is not None:
+        try:
+            data = model.model_validate(data).model_dump()
+        except ValidationError as exc:
+            errors = "; ".join(
+                f"{'.'.join(map(str, error['loc']))}: {error['msg']}"
+                for error in exc.errors()
+            )
+            raise ActionPayloadError(f"invalid {action} payload: {errors}") from exc
+    return encode_payload(data, "json").decode(), encode_payload(data, encoding)
+
+
+def decode_action(action: str, payload: bytes):
+    """
+    Turns a published payload back into its typed object (e.g. VibeShift),
+    or a plain dict for topics without a registered type.
+    """
+    data = decode_payload(payload)
+    model = ACTION_TYPES.get(action)
+    if model is None or data is None:
+        return data
+    return model.model_validate(data)
+
+
+def action_decoder(action: str):
+    """A topic router decoder producing the typed object for `action`."""
+
+    def decode(payload: bytes):
+        return decode_action(action, payload)
+
+    return decode
@@ -0,0 +1,145 @@
+import re
+import threading
+from collections import OrderedDict
+from minimax.app.services.embedding_cache import normalize_text
+
+_EDGE_PUNCTUATION = re.compile(r"^[\s.,!?;:]+|[\s.,!?;:]+$")
+
+# Rough size of one entry (key tuple, query string, answer dict), used to
+# budget memory without walking every object
+ENTRY_BYTES = 512
+
+
+def normalize_query(text: str) -> str:
+    """
+    normalize_text plus leading/trailing punctuation, which speech-to-text
+    adds or drops from one utterance to the next ("What's up?" / "what's up").
+    """
+    return _EDGE_PUNCTUATION.sub("", normalize_text(text))
+
+
+class AnswerCache:
+    """
+    Answers repeated queries without the embedding model or a vector search.
+
+    Two layers, both keyed by (space, normalize_query(text)):
+    - an exact-match index of every stored question, built from the table,
+      whose answer is the row's own chatbot answer (space None matches a
+      question in any space);
+    - a bounded LRU of answers previously computed by vector search.
+
+    Both are tied to the table version they were built from and rebuilt or
+    cleared when it changes. The version is read only when the table handle
+    passed in is a new object (TableHandle re-opens it periodically), so a
+    lookup normally costs one normalisation and a dict probe.
+    """
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        # One rebuild at a time; held while the table is scanned
+        self._rebuild_lock = threading.Lock()
+        self._table = None
+        self._version = None
+        self._exact = {}
+        self._responses = OrderedDict()
+        self._stats = {
+            "requests": 0,
+            "exact_hits": 0,
+            "cache_hits": 0,
+            "misses": 0,
+            "rebuilds": 0,
+        }
+
+    def _build_exact(self, table):
+        rows = (
+            table.search()
+            .select(["content", "space", "metadata"])
+            .limit(None)
+            .to_arrow()
+        )
+        exact = {}
+        for content, space, metadata in zip(
+            rows.column("content").to_pylist(),
+            rows.column("space").to_pylist(),
+            rows.column("metadata").to_pylist(),
+        ):
+            # Keep the first row when a question is stored more than once
+            key = normalize_query(content)
+            answer = metadata["use_cases"]["chatbot"]
+            exact.setdefault((space, key), answer)
+            exact.setdefault((None, key), answer)
+        return exact
+
+    def _sync(self, table):
+        """
+        Rebuilds both layers if the table moved to a new version. The rebuild
+        scans the table, so it runs outside _lock (store() and stats() are
+        called from the event loop) and is swapped in when done.
+        """
+        if table is self._table:
+            return
+        with self._rebuild_lock:
+            with self._lock:
+                if table is self._table:
+                    return
+                current = self._version
+            version = table.version
+            exact = self._build_exact(table) if version != current else None
+            with self._lock:
+                self._table = table
+                if exact is None:
+                    return
+                self._version = version
+                self._exact = exact
+                self._responses.clear()
+                self._stats["rebuilds"] += 1
+
+    def warm(self, table):
+        self._sync(table)
+        return self
+
+    def lookup(self, table, text: str, space: str = None):
+        """The cached answer for text, or None if it needs the model."""
+        key = (space, normalize_query(text))
+        self._sync(table)
+        with self._lock:
+            self._stats["requests"] += 1
+            answer = self._exact.get(key)
+            if answer is not None:
+                self._stats["exact_hits"] += 1
+                return answer
+            answer = self._responses.get(key)
+            if answer is not None:
+                self._responses.move_to_end(key)
+                self._stats["cache_hits"] += 1
+                return answer
+            self._stats["misses"] += 1
+            return None
+
+    def store(self, table, text: str, answer, space: str = None):
+        """Remembers a vector-search answer computed against table."""
+        key = (space, normalize_query(text))
+        with self._lock:
+            # An answer computed against an older version is not kept
+            if table is not self._table or self.max_size <= 0:
+                return
+            self._responses[key] = answer
+            self._responses.move_to_end(key)
+            while len(self._responses) > self.max_size:
+                self._responses.popitem(last=False)
+
+    def memory_bytes(self):
+        return (len(self._exact) + len(self._responses)) * ENTRY_BYTES
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["version"] = self._version
+            stats["exact_entries"] = len(self._exact)
+            stats["cached_responses"] = len(self._responses)
+        served = stats["exact_hits"] + stats["cache_hits"]
+        stats["served_without_model"] = (
+            served / stats["requests"] if stats["requests"] else 0.0
+        )
+        return stats
@@ -0,0 +1,137 @@
+import hashlib
+import re
+import threading
+import time
+import lancedb
+
+# The shared intent table, and the prefix of per-space tables when
+# SPACE_STORAGE is "table"
+QA_TABLE = "init_qa_action"
+SPACE_TABLE_PREFIX = QA_TABLE + "__"
+
+_UNSAFE_NAME = re.compile(r"[^A-Za-z0-9_-]")
+
+
+def space_table_name(space: str) -> str:
+    """
+    The table holding one space, e.g. init_qa_action__kitchen. Characters
+    LanceDB does not allow in table names are replaced, with a hash of the
+    original name appended so distinct spaces never share a table.
+    """
+    slug = _UNSAFE_NAME.sub("_", space)
+    if slug != space or not slug:
+        slug += "-" + hashlib.sha256(space.encode("utf-8")).hexdigest()[:8]
+    return SPACE_TABLE_PREFIX + slug
+
+
+def list_tables(db, prefix: str = ""):
+    """Every table name, following LanceDB's pages (table_names() stops at 10)."""
+    names, page_token = [], None
+    while True:
+        page = list(db.table_names(page_token=page_token, limit=1000))
+        names.extend(name for name in page if name.startswith(prefix))
+        if len(page) < 1000:
+            return names
+        page_token = page[-1]
+
+
+def table_exists(db, table_name: str) -> bool:
+    return table_name in list_tables(db, table_name)
+
+
+class TableHandle:
+    """
+    Process-wide LanceDB connection and open table handle.
+
+    The connection is opened once and kept for the life of the process. The
+    table handle is re-opened at most once every ``refresh_seconds`` so that a
+    re-initialized table (new version, or dropped and recreated by the CLI)
+    is picked up without paying ``open_table`` on every request.
+    """
+
+    def __init__(
+        self, db_path: str, table_name: str, refresh_seconds: float = 5.0, db=None
+    ):
+        self.db_path = db_path
+        self.table_name = table_name
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        # An existing connection can be shared between handles
+        self._db = db
+        self._table = None
+        self._opened_at = 0.0
+        self._stats = {
+            "connects": 0,
+            "opens": 0,
+            "requests": 0,
+            "connect_seconds": 0.0,
+            "open_seconds": 0.0,
+        }
+
+    def connect(self):
+        """Open the connection and the table. Safe to call more than once."""
+        with self._lock:
+            self._open_table()
+        return self
+
+    def _connect(self):
+        if self._db is None:
+            start = time.perf_counter()
+            self._db = lancedb.connect(self.db_path)
+            self._stats["connects"] += 1
+            self._stats["connect_seconds"] += time.perf_counter() - start
+
+    def _open_table(self):
+        self._connect()
+        start = time.perf_counter()
+        self._table = self._db.open_table(self.table_name)
+        self._opened_at = time.monotonic()
+        self._stats["opens"] += 1
+        self._stats["open_seconds"] += time.perf_counter() - start
+
+    def get(self):
+        """Return the open table, re-opening it if the refresh interval passed."""
+        with self._lock:
+            self._stats["requests"] += 1
+            if (
+                self._table is None
+                or time.monotonic() - self._opened_at > self.refresh_seconds
+            ):
+                self._open_table()
+            return self._table
+
+    def reload(self):
+        """Force the table to be re-opened, e.g. right after re-initialization."""
+        with self._lock:
+            self._open_table()
+            return self._table
+
+    @property
+    def db(self):
+        return self._db
+
+    def close(self):
+        with self._lock:
+            self._table = None
+            self._db = None
+
+    def stats(self):
+        """
+        Report how often the connection and table were opened versus how many
+        requests were served, and the average open cost each request avoided.
+        """
+        stats = dict(self._stats)
+        opens = stats["opens"] or 1
+        avg_open = stats["open_seconds"] / opens
+        avg_connect = stats["connect_seconds"] / (stats["connects"] or 1)
+        stats["version"] = self._table.version if self._table is not None else None
+        stats["avg_open_ms"] = avg_open * 1000
+        stats["avg_connect_ms"] = avg_connect * 1000
+        # Without the shared handle every request would connect and open.
+        avoided = max(stats["requests"] - stats["opens"], 0)
+        stats["saved_ms_per_request"] = (
+            (avg_open + avg_connect) * avoided / stats["requests"] * 1000
+            if stats["requests"]
+            else 0.0
+        )
+        return stats
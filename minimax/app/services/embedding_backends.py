@@ -0,0 +1,195 @@
+import os
+import re
+import tempfile
+import numpy as np
+
+
+class TorchEmbedder:
+    """sentence-transformers in float32, on MPS when available."""
+
+    name = "torch"
+
+    def __init__(self, model_name: str, cache_folder: str, threads: int = 0):
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        if threads:
+            # Process-wide: also applies to other torch models in the process
+            torch.set_num_threads(threads)
+        # Specify a persistent cache directory
+        os.makedirs(cache_folder, exist_ok=True)
+        model = SentenceTransformer(model_name, cache_folder=cache_folder)
+        model.to(self._device())
+        self.model = self._prepare(model)
+
+    def _device(self):
+        import torch
+
+        return torch.device("mps" if torch.backends.mps.is_built() else "cpu")
+
+    def _prepare(self, model):
+        return model
+
+    def encode(self, texts):
+        return self.model.encode(texts)
+
+    def get_sentence_embedding_dimension(self):
+        return self.model.get_sentence_embedding_dimension()
+
+
+class QuantizedTorchEmbedder(TorchEmbedder):
+    """
+    sentence-transformers with its Linear layers dynamically quantized to
+    int8 on CPU. The encoder's attention and feed-forward projections are
+    nearly all of its compute and quantize with little loss of agreement.
+    """
+
+    name = "torch-int8"
+
+    def _device(self):
+        # Dynamic quantization kernels only run on CPU
+        return "cpu"
+
+    def _prepare(self, model):
+        import torch
+
+        return torch.ao.quantization.quantize_dynamic(
+            model.eval(), {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+        )
+
+
+def export_onnx(model_name: str, cache_folder: str, export_dir: str):
+    """
+    Exports the whole sentence-transformers pipeline (transformer, pooling
+    and normalization) to export_dir/model.onnx, with the tokenizer saved
+    next to it, so serving needs neither torch nor sentence-transformers.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    class Encoder(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, input_ids, attention_mask):
+            features = {"input_ids": input_ids, "attention_mask": attention_mask}
+            return self.model(features)["sentence_embedding"]
+
+    print(f"Exporting {model_name} to ONNX in {export_dir}...")
+    model = SentenceTransformer(model_name, cache_folder=cache_folder, device="cpu")
+    sample = model.tokenizer(["turn the lights on"], return_tensors="pt")
+    os.makedirs(export_dir, exist_ok=True)
+    path = os.path.join(export_dir, "model.onnx")
+    # A file of its own, so processes exporting at once do not write into
+    # each other's output
+    with tempfile.NamedTemporaryFile(
+        dir=export_dir, prefix="model.", suffix=".onnx.tmp", delete=False
+    ) as tmp:
+        tmp_path = tmp.name
+    try:
+        with torch.no_grad():
+            torch.onnx.export(
+                Encoder(model).eval(),
+                (sample["input_ids"], sample["attention_mask"]),
+                tmp_path,
+                input_names=["input_ids", "attention_mask"],
+                output_names=["sentence_embedding"],
+                dynamic_axes={
+                    "input_ids": {0: "batch", 1: "sequence"},
+                    "attention_mask": {0: "batch", 1: "sequence"},
+                    "sentence_embedding": {0: "batch"},
+                },
+                opset_version=17,
+                # TorchScript exporter: the dynamo one needs onnxscript
+                dynamo=False,
+            )
+        # Truncate where sentence-transformers does, not at the tokenizer's limit
+        model.tokenizer.model_max_length = model.max_seq_length
+        model.tokenizer.save_pretrained(export_dir)
+        # Renamed last so a half-written export is never loaded
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    print("ONNX export done")
+
+
+class OnnxEmbedder:
+    """
+    The exported model run by ONNX Runtime on CPU, via the optional
+    onnxruntime package. The model is exported on first use (which needs
+    torch) and reused from the sentence-transformers cache folder after that.
+    """
+
+    name = "onnx"
+
+    def __init__(
+        self, model_name: str, cache_folder: str, threads: int = 0, batch_size=32
+    ):
+        try:
+            import onnxruntime
+        except ImportError as exc:
+            raise RuntimeError(
+                "The onnx embedding backend needs `pip install onnxruntime`"
+            ) from exc
+        from transformers import AutoTokenizer
+
+        export_dir = os.path.join(
+            cache_folder, "onnx", re.sub(r"[^A-Za-z0-9_.-]", "_", model_name)
+        )
+        path = os.path.join(export_dir, "model.onnx")
+        if not os.path.exists(path):
+            export_onnx(model_name, cache_folder, export_dir)
+
+        options = onnxruntime.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(
+            path, options, providers=["CPUExecutionProvider"]
+        )
+        self.tokenizer = AutoTokenizer.from_pretrained(export_dir)
+        self.batch_size = batch_size
+        self.dimension = self.session.get_outputs()[0].shape[-1]
+
+    def encode(self, texts):
+        embeddings = np.empty((len(texts), self.dimension), dtype=np.float32)
+        # Longest first, as sentence-transformers does, so batches pad little
+        order = np.argsort([-len(text) for text in texts], kind="stable")
+        for start in range(0, len(texts), self.batch_size):
+            rows = order[start : start + self.batch_size]
+            tokens = self.tokenizer(
+                [texts[i] for i in rows],
+                padding=True,
+                truncation=True,
+                return_tensors="np",
+            )
+            outputs = self.session.run(
+                None,
+                {
+                    "input_ids": tokens["input_ids"].astype(np.int64),
+                    "attention_mask": tokens["attention_mask"].astype(np.int64),
+                },
+            )
+            embeddings[rows] = outputs[0]
+        return embeddings
+
+    def get_sentence_embedding_dimension(self):
+        return self.dimension
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (TorchEmbedder, QuantizedTorchEmbedder, OnnxEmbedder)
+}
+
+
+def load_embedding_backend(
+    name: str, model_name: str, cache_folder: str, threads: int = 0
+):
+    if name not in BACKENDS:
+        raise ValueError(
+            f"Unknown embedding backend {name!r}, choose from {list(BACKENDS)}"
+        )
+    return BACKENDS[name](model_name, cache_folder, threads)
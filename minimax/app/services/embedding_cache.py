@@ -0,0 +1,175 @@
+import contextlib
+import fcntl
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+import numpy as np
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Lowercases and collapses whitespace so trivially different phrasings share a key."""
+    return _WHITESPACE.sub(" ", text).strip().lower()
+
+
+class EmbeddingCache:
+    """
+    Persistent embedding cache keyed by model name plus normalized text.
+
+    Entries live in an append-only file of fixed-size records (32-byte key
+    digest followed by the float32 vector) that is memory-mapped for reads,
+    with an in-process LRU in front of it. Each batch of new entries is
+    written with a single append, so a crash can at worst lose the tail.
+    """
+
+    def __init__(self, path: str, model_name: str, dim: int, lru_size: int = 4096):
+        self.model_name = model_name
+        self.dim = dim
+        self.lru_size = lru_size
+        self._dtype = np.dtype([("key", "S32"), ("vector", "<f4", (dim,))])
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", model_name)
+        os.makedirs(path, exist_ok=True)
+        self.file_path = os.path.join(path, f"{safe_name}-{dim}.bin")
+        self._lock = threading.Lock()
+        self._lru = OrderedDict()
+        self._rows = {}
+        self._mapped = None
+        self._mapped_rows = 0
+        self._stats = {"lru_hits": 0, "store_hits": 0, "misses": 0}
+        self._load()
+
+    @contextlib.contextmanager
+    def _locked_file(self):
+        """
+        The cache file opened for appending under an exclusive flock. The API,
+        the STT worker and the CLI share the file, so every append and repair
+        happens under this lock.
+        """
+        fd = os.open(self.file_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield fd
+        finally:
+            # Closing the descriptor releases the lock
+            os.close(fd)
+
+    def _aligned_size(self, fd):
+        """The file size in whole records, dropping a record torn by a crash."""
+        size = os.fstat(fd).st_size
+        if size % self._dtype.itemsize:
+            # Safe under the lock: no other writer can be mid-append
+            size -= size % self._dtype.itemsize
+            os.ftruncate(fd, size)
+        return size
+
+    def _load(self):
+        if not os.path.exists(self.file_path):
+            return
+        with self._locked_file() as fd:
+            self._aligned_size(fd)
+        self._remap()
+        if self._mapped is None:
+            return
+        for row, key in enumerate(self._mapped["key"]):
+            # numpy strips trailing NUL bytes from S32 values; restore them
+            self._rows[bytes(key).ljust(32, b"\0")] = row
+
+    def _remap(self):
+        rows = os.path.getsize(self.file_path) // self._dtype.itemsize
+        if rows:
+            self._mapped = np.memmap(
+                self.file_path, dtype=self._dtype, mode="r", shape=(rows,)
+            )
+        self._mapped_rows = rows
+
+    def key(self, text: str) -> bytes:
+        return hashlib.sha256(
+            f"{self.model_name}\x1f{normalize_text(text)}".encode("utf-8")
+        ).digest()
+
+    def _lookup(self, key):
+        vector = self._lru.get(key)
+        if vector is not None:
+            self._lru.move_to_end(key)
+            self._stats["lru_hits"] += 1
+            return vector
+        row = self._rows.get(key)
+        if row is None:
+            return None
+        if row >= self._mapped_rows:
+            self._remap()
+        vector = np.array(self._mapped["vector"][row])
+        self._remember(key, vector)
+        self._stats["store_hits"] += 1
+        return vector
+
+    def _remember(self, key, vector):
+        self._lru[key] = vector
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    def _append(self, keys, vectors):
+        records = np.empty(len(keys), dtype=self._dtype)
+        records["key"] = keys
+        records["vector"] = vectors
+        # The lock makes the size read and the write one step across processes,
+        # so no other writer can take the same rows
+        with self._locked_file() as fd:
+            row = self._aligned_size(fd) // self._dtype.itemsize
+            os.write(fd, records.tobytes())
+        for offset, key in enumerate(keys):
+            self._rows[key] = row + offset
+
+    def encode(self, texts: list, encode_fn) -> np.ndarray:
+        """
+        Returns a (len(texts), dim) matrix, calling encode_fn only for texts
+        that are neither in the LRU nor on disk, and persisting those results.
+        """
+        keys = [self.key(text) for text in texts]
+        result = np.empty((len(texts), self.dim), dtype=np.float32)
+        missing = {}
+        with self._lock:
+            for index, key in enumerate(keys):
+                vector = self._lookup(key)
+                if vector is None:
+                    missing.setdefault(key, []).append(index)
+                else:
+                    result[index] = vector
+            self._stats["misses"] += sum(len(rows) for rows in missing.values())
+
+        if not missing:
+            return result
+
+        miss_keys = list(missing)
+        miss_texts = [normalize_text(texts[missing[key][0]]) for key in miss_keys]
+        vectors = np.asarray(encode_fn(miss_texts), dtype=np.float32)
+
+        with self._lock:
+            positions = [
+                position
+                for position, key in enumerate(miss_keys)
+                if key not in self._rows
+            ]
+            if positions:
+                self._append([miss_keys[i] for i in positions], vectors[positions])
+            for key, vector in zip(miss_keys, vectors):
+                self._remember(key, vector)
+                result[missing[key]] = vector
+        return result
+
+    def __len__(self):
+        return len(self._rows)
+
+    def stats(self):
+        stats = dict(self._stats)
+        lookups = stats["lru_hits"] + stats["store_hits"] + stats["misses"]
+        stats["entries"] = len(self._rows)
+        stats["lru_entries"] = len(self._lru)
+        stats["hit_rate"] = (
+            (stats["lru_hits"] + stats["store_hits"]) / lookups if lookups else 0.0
+        )
+        return stats
@@ -0,0 +1,119 @@
+import asyncio
+import contextlib
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Overloaded(Exception):
+    """Raised when a request is not admitted; retry_after is in seconds."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Overloaded, retry after {retry_after} s")
+        self.retry_after = retry_after
+
+
+class BoundedExecutor:
+    """
+    A fixed pool of worker threads for blocking work (embedding, vector
+    search, reranking, table loads), so none of it runs on the event loop,
+    with admission control in front of it.
+
+    A request is admitted while fewer than `workers + max_queue` requests
+    are in flight; beyond that Overloaded is raised at once instead of
+    queueing work that would only time out. Its retry_after estimates how
+    long the admitted backlog takes to drain, from the average time an
+    admitted request has taken.
+    """
+
+    def __init__(self, workers: int = 4, max_queue: int = 64):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix="minimax-blocking")
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._avg_seconds = 0.0
+        self._stats = {
+            "admitted": 0,
+            "rejected": 0,
+            "calls": 0,
+            "wait_seconds": 0.0,
+            "run_seconds": 0.0,
+        }
+
+    @property
+    def limit(self):
+        return self.workers + self.max_queue
+
+    def retry_after(self) -> int:
+        backlog = self._in_flight / self.workers
+        return max(1, math.ceil(backlog * self._avg_seconds))
+
+    def _check(self):
+        if self._in_flight >= self.limit:
+            self._stats["rejected"] += 1
+            raise Overloaded(self.retry_after())
+
+    def check(self):
+        """Raises Overloaded if a request arriving now would not be admitted."""
+        with self._lock:
+            self._check()
+
+    def acquire(self, force: bool = False):
+        """
+        Admits one request or raises Overloaded; pair with release(). With
+        force the request is admitted regardless, for work already accepted
+        by an earlier check().
+        """
+        with self._lock:
+            if not force:
+                self._check()
+            self._in_flight += 1
+            self._stats["admitted"] += 1
+        return time.perf_counter()
+
+    def release(self, admitted_at: float):
+        elapsed = time.perf_counter() - admitted_at
+        with self._lock:
+            self._in_flight -= 1
+            # Moving average, so the retry hint follows the current load
+            self._avg_seconds += 0.1 * (elapsed - self._avg_seconds)
+
+    @contextlib.contextmanager
+    def admit(self, force: bool = False):
+        admitted_at = self.acquire(force)
+        try:
+            yield
+        finally:
+            self.release(admitted_at)
+
+    def _call(self, submitted_at, func, args):
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            with self._lock:
+                self._stats["calls"] += 1
+                self._stats["wait_seconds"] += started - submitted_at
+                self._stats["run_seconds"] += time.perf_counter() - started
+
+    async def run(self, func, *args):
+        """Runs func(*args) on a worker thread and awaits its result."""
+        future = self._pool.submit(self._call, time.perf_counter(), func, args)
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = self._in_flight
+            stats["avg_request_ms"] = self._avg_seconds * 1000
+        calls = stats["calls"] or 1
+        stats["workers"] = self.workers
+        stats["max_queue"] = self.max_queue
+        stats["avg_wait_ms"] = stats["wait_seconds"] / calls * 1000
+        stats["avg_run_ms"] = stats["run_seconds"] / calls * 1000
+        return stats
@@ -1,36 +1,151 @@
 import requests
 import os
+import asyncio
+import time
 import base64
 import numpy as np
-import torch
-from sentence_transformers import SentenceTransformer
 from functools import lru_cache
+from minimax.app.core.config import settings
+from minimax.app.services.embedding_backends import load_embedding_backend
+from minimax.app.services.embedding_cache import EmbeddingCache
 
 # Get the directory where this file (inference.py) is located
 current_dir = os.path.dirname(os.path.abspath(__file__))
 cache_folder = os.path.join(current_dir, "sentence_transformer_cache")
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
 
 
 @lru_cache(maxsize=1)
 def get_model():
-    print(f"Using model: Bert")
-    device = (
-        torch.device("mps") if torch.backends.mps.is_built() else torch.device("cpu")
+    # The backends import torch / onnxruntime when loaded, so importing this
+    # module (e.g. from the CLI) does not load a neural network
+    print(f"Using model: Bert ({settings.EMBED_BACKEND})")
+    return load_embedding_backend(
+        settings.EMBED_BACKEND, MODEL_NAME, cache_folder, settings.EMBED_THREADS
     )
-    # Specify a persistent cache directory
-    os.makedirs(cache_folder, exist_ok=True)
 
-    model = SentenceTransformer(
-        "sentence-transformers/all-MiniLM-L6-v2", cache_folder=cache_folder
+
+def get_text_embeddings(texts: list):
+    """uses a pretrained sentence encoder from torch hub to get embeddings for a list of texts"""
+    embeddings = get_batch_embeddings(texts)
+    return embeddings[0]
+
+
+@lru_cache(maxsize=1)
+def get_embedding_cache():
+    # Quantized backends give slightly different vectors, so they are cached
+    # apart from the float32 model's
+    model_key = MODEL_NAME
+    if settings.EMBED_BACKEND != "torch":
+        model_key = f"{MODEL_NAME}@{settings.EMBED_BACKEND}"
+    return EmbeddingCache(
+        settings.EMBED_CACHE_PATH,
+        model_key,
+        get_model().get_sentence_embedding_dimension(),
+        lru_size=settings.EMBED_CACHE_LRU_SIZE,
     )
-    model.to(device)
-    return model
 
 
-model = get_model()
+def get_batch_embeddings(texts: list):
+    """encodes a list of texts in one forward pass, returning one row per text"""
+    if not settings.EMBED_CACHE_ENABLED:
+        return get_model().encode(texts)
+    # Only texts missing from the persistent cache reach the model
+    return get_embedding_cache().encode(texts, get_model().encode)
 
 
-def get_text_embeddings(texts: list):
-    """uses a pretrained sentence encoder from torch hub to get embeddings for a list of texts"""
-    embeddings = model.encode(texts)
-    return embeddings[0]
+class EmbeddingBatcher:
+    """
+    Collects concurrent embedding requests and encodes them in one
+    `model.encode` call on a worker thread, so the event loop is never blocked
+    by the forward pass and concurrent queries share it.
+
+    A batch is flushed once it holds `max_batch_size` texts or `max_wait_ms`
+    has passed since its first text arrived. With an `executor` (a
+    BoundedExecutor) batches are encoded on its worker threads rather than
+    the default thread pool.
+    """
+
+    def __init__(
+        self,
+        encode=None,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 2.0,
+        executor=None,
+    ):
+        self._encode = encode or get_batch_embeddings
+        self._run_blocking = executor.run if executor is not None else asyncio.to_thread
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = None
+        self._task = None
+        self._stats = {"batches": 0, "texts": 0, "encode_seconds": 0.0}
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def embed(self, text: str):
+        """Returns the embedding for a single text once its batch is encoded."""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    async def _collect(self):
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            # Take whatever is already queued before waiting for more
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            if loop.time() >= deadline:
+                break
+            try:
+                # Not wait_for: on 3.11 it can drop an item get() already took
+                # when the timeout fires at the same moment. Here a get() that
+                # returned is never cancelled, and a cancelled one leaves its
+                # item queued.
+                async with asyncio.timeout_at(deadline):
+                    batch.append(await self._queue.get())
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            texts = [text for text, _ in batch]
+            start = time.perf_counter()
+            try:
+                vectors = await self._run_blocking(self._encode, texts)
+            except Exception as exc:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            self._stats["batches"] += 1
+            self._stats["texts"] += len(texts)
+            self._stats["encode_seconds"] += time.perf_counter() - start
+            for (_, future), vector in zip(batch, vectors):
+                if not future.done():
+                    future.set_result(vector)
+
+    def stats(self):
+        stats = dict(self._stats)
+        batches = stats["batches"] or 1
+        stats["avg_batch_size"] = stats["texts"] / batches
+        stats["avg_encode_ms"] = stats["encode_seconds"] / batches * 1000
+        stats["pending"] = self._queue.qsize() if self._queue is not None else 0
+        return stats
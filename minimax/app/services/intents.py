@@ -0,0 +1,231 @@
+import base64
+from functools import lru_cache
+from minimax.app.core.config import settings
+from minimax.app.services.answer_cache import AnswerCache
+from minimax.app.services.inference import get_batch_embeddings, get_text_embeddings
+from minimax.app.services.rerank import get_reranker
+from minimax.app.services.vector_index import SearchEngine
+
+# Cosine distance below which the closest question counts as a match, unless
+# SPACE_THRESHOLDS sets one for the query's space
+MATCH_THRESHOLD = 0.55
+
+NOT_SURE = "I'm not sure how to help with that"
+
+
+def answer_from_results(results, threshold: float = MATCH_THRESHOLD):
+    """Turns the top search hit into the chat answer returned to callers."""
+    try:
+        if results:
+            result = results[0]
+            score = result["_distance"]
+            print("score: ", score)
+
+            if score < threshold:
+                print("score from user query", score)
+                answer = result["metadata"]["use_cases"]["chatbot"]
+            else:
+                answer = {"answer": NOT_SURE, "action": ""}
+        else:
+            answer = {"answer": "No matching response found", "action": ""}
+
+    except KeyError as exc:
+        print(exc)
+        answer = {"answer": "Error processing request", "action": ""}
+
+    return answer
+
+
+def public_answer(answer):
+    """
+    The answer as returned over HTTP: the binary payload compiled at ingest
+    is sent base64-encoded, so HTTP clients publish the same bytes (JSON or
+    msgpack) as in-process callers.
+    """
+    public = dict(answer)
+    if public.get("payload") is not None:
+        public["payload"] = base64.b64encode(public["payload"]).decode("ascii")
+    return public
+
+
+class Retriever:
+    """
+    Space-filtered top-k retrieval plus the match decision.
+
+    Candidates come only from the query's space. The best candidate is
+    accepted below the space's threshold, as before. When a reranker is set
+    and the best distance is below the threshold by less than `band`, where
+    the bi-encoder distance alone is unreliable, the reranker scores the
+    top-k questions that are also below the threshold, and its best pick is
+    accepted if it scores at least `min_rerank_score`. The reranker can
+    reorder or reject matches but never turns a miss into a hit. Clear hits
+    and misses never pay for reranking, and without a reranker only the top
+    hit is fetched.
+
+    With filter_by_space off the table is taken to hold a single space (one
+    table per space), so searches skip the space filter; thresholds still
+    follow the query's space.
+    """
+
+    def __init__(
+        self,
+        engine: SearchEngine,
+        thresholds: dict = None,
+        top_k: int = 5,
+        reranker=None,
+        band: float = 0.15,
+        min_rerank_score: float = 0.5,
+        filter_by_space: bool = True,
+    ):
+        self.engine = engine
+        self.thresholds = thresholds or {}
+        self.top_k = top_k
+        self.reranker = reranker
+        self.band = band
+        self.min_rerank_score = min_rerank_score
+        self.filter_by_space = filter_by_space
+        self._stats = {"queries": 0, "ambiguous": 0, "reranked_changed": 0}
+
+    @property
+    def k(self):
+        return max(self.top_k, 1) if self.reranker is not None else 1
+
+    def threshold(self, space: str = None) -> float:
+        return self.thresholds.get(space, MATCH_THRESHOLD)
+
+    def _filter(self, space):
+        return space if self.filter_by_space else None
+
+    def candidates(self, table, embedding, space: str = None, k: int = None):
+        return self.engine.search(table, embedding, k or self.k, self._filter(space))
+
+    def candidates_batch(self, table, embeddings, space: str = None):
+        return self.engine.search_batch(table, embeddings, self.k, self._filter(space))
+
+    def decide(self, content: str, results, space: str = None):
+        self._stats["queries"] += 1
+        threshold = self.threshold(space)
+        if (
+            self.reranker is None
+            or not results
+            or not 0 <= threshold - results[0]["_distance"] < self.band
+        ):
+            return answer_from_results(results, threshold)
+
+        self._stats["ambiguous"] += 1
+        # Only candidates that match on their own are reranked
+        matches = [row for row in results if row["_distance"] < threshold]
+        scores = self.reranker.score(content, [row["content"] for row in matches])
+        best = max(range(len(scores)), key=scores.__getitem__)
+        print(f"reranked with {self.reranker.name}: {scores[best]:.3f}")
+        if best != 0:
+            self._stats["reranked_changed"] += 1
+        if scores[best] < self.min_rerank_score:
+            return {"answer": NOT_SURE, "action": ""}
+        return matches[best]["metadata"]["use_cases"]["chatbot"]
+
+    def answer(self, table, content: str, embedding, space: str = None):
+        return self.decide(content, self.candidates(table, embedding, space), space)
+
+    def stats(self):
+        stats = dict(self._stats)
+        stats["reranker"] = self.reranker.name if self.reranker is not None else None
+        stats["top_k"] = self.k
+        return stats
+
+
+def create_search_engine():
+    return SearchEngine(
+        settings.SEARCH_ENGINE,
+        settings.SEARCH_NUMPY_MAX_ROWS,
+        settings.ANN_NPROBES,
+        settings.ANN_REFINE_FACTOR,
+    )
+
+
+def create_retriever(engine: SearchEngine = None, filter_by_space: bool = True):
+    return Retriever(
+        engine or create_search_engine(),
+        thresholds=settings.SPACE_THRESHOLDS,
+        top_k=settings.RETRIEVAL_TOP_K,
+        reranker=get_reranker(settings.RERANKER, settings.RERANK_CROSS_ENCODER_MODEL),
+        band=settings.RERANK_BAND,
+        min_rerank_score=settings.RERANK_MIN_SCORE,
+        filter_by_space=filter_by_space,
+    )
+
+
+def resolve_batch(
+    table,
+    queries,
+    retriever: Retriever,
+    answers: AnswerCache = None,
+    encode=None,
+):
+    """
+    Answers many (content, space) queries at once: cached answers first, then
+    every remaining distinct text embedded in one encode call and searched
+    with one vectorized top-k per space. Returns one answer per query, in
+    order.
+    """
+    encode = encode or get_batch_embeddings
+    results = [None] * len(queries)
+    if answers is not None:
+        for i, (content, space) in enumerate(queries):
+            results[i] = answers.lookup(table, content, space)
+    # Each distinct query is embedded and searched once
+    misses = list(
+        dict.fromkeys(query for query, a in zip(queries, results) if a is None)
+    )
+    if misses:
+        texts = list(dict.fromkeys(content for content, _ in misses))
+        embeddings = dict(zip(texts, encode(texts)))
+        by_space = {}
+        for content, space in misses:
+            by_space.setdefault(space, []).append(content)
+
+        resolved = {}
+        for space, contents in by_space.items():
+            hits = retriever.candidates_batch(
+                table, [embeddings[c] for c in contents], space
+            )
+            for content, hit in zip(contents, hits):
+                answer = retriever.decide(content, hit, space)
+                resolved[content, space] = answer
+                if answers is not None:
+                    answers.store(table, content, answer, space)
+        results = [resolved[q] if a is None else a for q, a in zip(queries, results)]
+    return results
+
+
+class IntentResolver:
+    """
+    Answers chat queries in-process with the same lookup as /api/text/chat/,
+    for single-box deployments where the STT worker can skip HTTP.
+    """
+
+    def __init__(self, spaces=None):
+        # spaces builds retrievers from this module
+        from minimax.app.services.spaces import create_space_registry
+
+        self.spaces = spaces or create_space_registry().connect()
+
+    def resolve(self, content: str, space: str = "chatbot"):
+        loaded, table = self.spaces.open(space)
+        if loaded is None:
+            return answer_from_results([])
+        answers = loaded.answers
+        if answers is not None:
+            answer = answers.lookup(table, content, space)
+            if answer is not None:
+                return answer
+        embedding = get_text_embeddings([content])
+        answer = loaded.retriever.answer(table, content, embedding, space)
+        if answers is not None:
+            answers.store(table, content, answer, space)
+        return answer
+
+
+@lru_cache(maxsize=1)
+def get_intent_resolver():
+    return IntentResolver()
@@ -0,0 +1,76 @@
+import re
+from functools import lru_cache
+
+_TOKEN = re.compile(r"[a-z0-9']+")
+
+
+def tokens(text: str):
+    return _TOKEN.findall(text.lower())
+
+
+class LexicalReranker:
+    """
+    Scores candidates by token overlap (F1 of shared words) with the query.
+    No model and microseconds per candidate; it favours the candidate that
+    shares the most words with the query, but one differing word barely
+    moves the score, so it does not tell "lights on" from "lights off" (0.5).
+    """
+
+    name = "lexical"
+
+    def score(self, query: str, candidates):
+        query_tokens = set(tokens(query))
+        scores = []
+        for candidate in candidates:
+            candidate_tokens = set(tokens(candidate))
+            shared = len(query_tokens & candidate_tokens)
+            if not shared:
+                scores.append(0.0)
+                continue
+            precision = shared / len(candidate_tokens)
+            recall = shared / len(query_tokens)
+            scores.append(2 * precision * recall / (precision + recall))
+        return scores
+
+
+class CrossEncoderReranker:
+    """
+    A sentence-transformers cross-encoder that reads query and candidate
+    together. Far more accurate than the bi-encoder distance, and far slower,
+    so it only runs on the few candidates of ambiguous queries. The model is
+    loaded on first use.
+    """
+
+    name = "cross-encoder"
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+
+    @property
+    def model(self):
+        return _load_cross_encoder(self.model_name)
+
+    def score(self, query: str, candidates):
+        if not candidates:
+            return []
+        scores = self.model.predict([(query, candidate) for candidate in candidates])
+        return [float(score) for score in scores]
+
+
+@lru_cache(maxsize=None)
+def _load_cross_encoder(model_name: str):
+    from sentence_transformers import CrossEncoder
+    from minimax.app.services.inference import cache_folder
+
+    return CrossEncoder(model_name, cache_folder=cache_folder)
+
+
+def get_reranker(name: str, cross_encoder_model: str = None):
+    """None for "none", otherwise the named reranker."""
+    if name in (None, "", "none"):
+        return None
+    if name == "lexical":
+        return LexicalReranker()
+    if name == "cross-encoder":
+        return CrossEncoderReranker(cross_encoder_model)
+    raise ValueError(f"Unknown reranker: {name!r}")
@@ -0,0 +1,236 @@
+import threading
+import time
+from collections import OrderedDict
+import lancedb
+from minimax.app.core.config import settings
+from minimax.app.services.answer_cache import AnswerCache
+from minimax.app.services.database import QA_TABLE, TableHandle, space_table_name
+from minimax.app.services.intents import create_retriever, create_search_engine
+
+# Rough cost of an open LanceDB table handle (manifest, schema, caches)
+HANDLE_BYTES = 1 << 20
+# Most space names remembered as having no table
+MAX_MISSING = 10000
+
+
+class Space:
+    """
+    Everything the API holds open for one intent table: the table handle,
+    the retriever with its search engine (and NumPy index), and the answer
+    cache.
+    """
+
+    def __init__(self, name, handle: TableHandle, retriever, answers=None):
+        self.name = name
+        self.handle = handle
+        self.retriever = retriever
+        self.answers = answers
+
+    @property
+    def engine(self):
+        return self.retriever.engine
+
+    def table(self):
+        return self.handle.get()
+
+    def memory_bytes(self):
+        answers = self.answers.memory_bytes() if self.answers is not None else 0
+        return HANDLE_BYTES + self.engine.memory_bytes() + answers
+
+    def close(self):
+        self.handle.close()
+
+    def stats(self):
+        return {
+            "table": self.handle.table_name,
+            "memory_bytes": self.memory_bytes(),
+            "handle": self.handle.stats(),
+            "search": self.engine.stats(),
+            "retriever": self.retriever.stats(),
+            "answers": self.answers.stats() if self.answers is not None else None,
+        }
+
+
+class SpaceRegistry:
+    """
+    Open spaces, loaded on first use and kept in an LRU bounded by memory.
+
+    With storage "shared" every space is served by init_qa_action, loaded
+    once, and searches filter on the space column. With storage "table" each
+    space has its own table: a space's handle, index and answer cache are
+    only built when a query for it arrives, and once the open spaces' memory
+    exceeds the budget the least recently used ones are closed. Spaces with
+    no table are remembered for `refresh_seconds` (at most MAX_MISSING of
+    them) so unknown names do not reach LanceDB on every request.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        storage: str = "shared",
+        memory_budget_bytes: int = 512 << 20,
+        refresh_seconds: float = 5.0,
+    ):
+        if storage not in ("shared", "table"):
+            raise ValueError(f"Unknown space storage: {storage!r}")
+        self.db_path = db_path
+        self.storage = storage
+        self.memory_budget_bytes = memory_budget_bytes
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._db = None
+        self._spaces = OrderedDict()
+        self._loading = {}
+        # Space key -> when it was found missing, oldest first
+        self._missing = OrderedDict()
+        self._stats = {
+            "hits": 0,
+            "loads": 0,
+            "missing": 0,
+            "evictions": 0,
+            "load_seconds": 0.0,
+        }
+
+    def key(self, space: str):
+        """The space's entry in the registry; None is the shared table."""
+        return None if self.storage == "shared" else space
+
+    def connect(self):
+        """Open the connection, and the shared table when storage is shared."""
+        with self._lock:
+            if self._db is None:
+                self._db = lancedb.connect(self.db_path)
+        if self.storage == "shared":
+            self.get(None)
+        return self
+
+    def _load(self, key):
+        table_name = QA_TABLE if key is None else space_table_name(key)
+        handle = TableHandle(
+            self.db_path, table_name, self.refresh_seconds, db=self._db
+        )
+        try:
+            handle.connect()
+        except ValueError:
+            # LanceDB raises ValueError for a table that does not exist
+            return None
+        table = handle.get()
+        engine = create_search_engine().warm(table)
+        retriever = create_retriever(engine, filter_by_space=key is None)
+        answers = None
+        if settings.ANSWER_CACHE_ENABLED:
+            answers = AnswerCache(settings.ANSWER_CACHE_SIZE).warm(table)
+        return Space(key, handle, retriever, answers)
+
+    def get(self, space: str):
+        """The Space serving space, loading it if needed; None if it has no table."""
+        key = self.key(space)
+        with self._lock:
+            loaded = self._spaces.get(key)
+            if loaded is not None:
+                self._spaces.move_to_end(key)
+                self._stats["hits"] += 1
+                return loaded
+            missing_at = self._missing.get(key)
+            if (
+                missing_at is not None
+                and time.monotonic() - missing_at < self.refresh_seconds
+            ):
+                return None
+            # One load per space; concurrent requests for it wait here
+            load_lock = self._loading.setdefault(key, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                loaded = self._spaces.get(key)
+            if loaded is not None:
+                return loaded
+            start = time.perf_counter()
+            loaded = self._load(key)
+            with self._lock:
+                self._loading.pop(key, None)
+                if loaded is None:
+                    self._remember_missing(key)
+                    return None
+                self._missing.pop(key, None)
+                self._spaces[key] = loaded
+                self._stats["loads"] += 1
+                self._stats["load_seconds"] += time.perf_counter() - start
+                self._evict()
+        return loaded
+
+    def _remember_missing(self, key):
+        now = time.monotonic()
+        self._missing.pop(key, None)
+        self._missing[key] = now
+        self._stats["missing"] += 1
+        # Client-supplied names are unbounded: drop expired entries, then
+        # the oldest ones beyond MAX_MISSING
+        while self._missing:
+            oldest, missing_at = next(iter(self._missing.items()))
+            if (
+                now - missing_at < self.refresh_seconds
+                and len(self._missing) <= MAX_MISSING
+            ):
+                break
+            del self._missing[oldest]
+
+    def _evict(self):
+        """Closes least recently used spaces until the rest fit the budget."""
+        used = sum(space.memory_bytes() for space in self._spaces.values())
+        # The most recently used space stays even if it alone is over budget
+        while used > self.memory_budget_bytes and len(self._spaces) > 1:
+            _, space = self._spaces.popitem(last=False)
+            used -= space.memory_bytes()
+            space.close()
+            self._stats["evictions"] += 1
+
+    def discard(self, space: str):
+        with self._lock:
+            loaded = self._spaces.pop(self.key(space), None)
+        if loaded is not None:
+            loaded.close()
+
+    def open(self, space: str):
+        """(Space, open table) serving space, or (None, None) if it has no table."""
+        loaded = self.get(space)
+        if loaded is None:
+            return None, None
+        try:
+            return loaded, loaded.table()
+        except ValueError:
+            # The table was dropped since it was loaded, e.g. by a sync
+            self.discard(space)
+            return None, None
+
+    def close(self):
+        with self._lock:
+            spaces = list(self._spaces.values())
+            self._spaces.clear()
+            self._db = None
+        for space in spaces:
+            space.close()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            spaces = list(self._spaces.items())
+        per_space = {
+            QA_TABLE if key is None else key: space.stats() for key, space in spaces
+        }
+        stats["storage"] = self.storage
+        stats["loaded"] = len(spaces)
+        stats["memory_bytes"] = sum(s["memory_bytes"] for s in per_space.values())
+        stats["memory_budget_bytes"] = self.memory_budget_bytes
+        stats["avg_load_ms"] = stats["load_seconds"] / (stats["loads"] or 1) * 1000
+        stats["spaces"] = per_space
+        return stats
+
+
+def create_space_registry():
+    return SpaceRegistry(
+        settings.DB_PATH,
+        settings.SPACE_STORAGE,
+        int(settings.SPACE_CACHE_MEMORY_MB * (1 << 20)),
+        settings.DB_TABLE_REFRESH_SECONDS,
+    )
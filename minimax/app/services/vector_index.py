@@ -0,0 +1,200 @@
+import threading
+import time
+import numpy as np
+
+
+def space_filter(space: str) -> str:
+    return "space = '{}'".format(space.replace("'", "''"))
+
+
+def lancedb_search(
+    table, embedding, k: int = 1, nprobes=None, refine_factor=None, space=None
+):
+    """
+    Vector search in LanceDB. With a space, rows are filtered on the space
+    column (scalar-indexed by init) before the vector search. nprobes and
+    refine_factor only matter once the table has an ANN index; without one
+    the search is an exact flat scan.
+    """
+    query = table.search(embedding, vector_column_name="content_embedding")
+    if space is not None:
+        query = query.where(space_filter(space), prefilter=True)
+    if nprobes:
+        query = query.nprobes(nprobes)
+    if refine_factor:
+        query = query.refine_factor(refine_factor)
+    return query.limit(k).to_list()
+
+
+class NumpyIndex:
+    """
+    Every content_embedding of a table in one contiguous, L2-normalized
+    float32 matrix, searched with a single matrix-vector product and
+    argpartition. Only the top-k rows are turned into dicts. Rows are sorted
+    by space, so searching one space scans a contiguous slice of the matrix.
+
+    `_distance` is 2 - 2 * cosine, which is the squared L2 distance LanceDB
+    reports for the unit-length vectors the model produces, so the same
+    match threshold applies to both engines.
+    """
+
+    def __init__(self, table):
+        rows = (
+            table.search()
+            .select(["content", "content_embedding", "space", "metadata"])
+            .limit(None)
+            .to_arrow()
+            .sort_by("space")
+        )
+        spaces = rows.column("space").to_pylist()
+        self.slices = {}
+        for i, space in enumerate(spaces):
+            start, _ = self.slices.get(space, (i, i))
+            self.slices[space] = (start, i + 1)
+        embeddings = rows.column("content_embedding").combine_chunks()
+        matrix = embeddings.values.to_numpy(zero_copy_only=False)
+        self.matrix = _normalize(
+            np.ascontiguousarray(matrix, dtype=np.float32).reshape(len(rows), -1)
+        )
+        self.content = rows.column("content").combine_chunks()
+        self.metadata = rows.column("metadata").combine_chunks()
+
+    def __len__(self):
+        return self.matrix.shape[0]
+
+    @property
+    def nbytes(self):
+        return self.matrix.nbytes + self.content.nbytes + self.metadata.nbytes
+
+    def search(self, embedding, k: int = 1, space=None):
+        return self.search_batch(np.asarray(embedding).reshape(1, -1), k, space)[0]
+
+    def search_batch(self, embeddings, k: int = 1, space=None):
+        """Top-k for every row of embeddings with one matrix product."""
+        queries = _normalize(np.asarray(embeddings, dtype=np.float32))
+        if space is None:
+            offset, end = 0, len(self)
+        else:
+            offset, end = self.slices.get(space, (0, 0))
+        if end <= offset:
+            return [[] for _ in queries]
+        scores = queries @ self.matrix[offset:end].T
+        k = min(k, scores.shape[1])
+        if k < scores.shape[1]:
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        top += offset
+        return [
+            [
+                {
+                    "content": self.content[i].as_py(),
+                    "metadata": self.metadata[i].as_py(),
+                    "_distance": float(2.0 - 2.0 * score),
+                }
+                for i, score in zip(row, row_scores)
+            ]
+            for row, row_scores in zip(top, top_scores)
+        ]
+
+
+def _normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class SearchEngine:
+    """
+    Picks how a table is searched. "numpy" and "auto" load small tables into
+    a NumpyIndex; "auto" falls back to LanceDB above `max_rows`, and
+    "lancedb" always queries the table. The index is rebuilt when the table
+    version changes, checked only when TableHandle hands out a new table
+    object.
+    """
+
+    def __init__(
+        self,
+        mode: str = "auto",
+        max_rows: int = 50000,
+        nprobes: int = None,
+        refine_factor: int = None,
+    ):
+        if mode not in ("auto", "numpy", "lancedb"):
+            raise ValueError(f"Unknown search engine: {mode!r}")
+        self.mode = mode
+        self.max_rows = max_rows
+        self.nprobes = nprobes
+        self.refine_factor = refine_factor
+        self._lock = threading.Lock()
+        self._table = None
+        self._version = None
+        self._index = None
+        self._stats = {"numpy": 0, "lancedb": 0, "builds": 0, "build_seconds": 0.0}
+
+    def _sync(self, table):
+        if table is self._table:
+            return
+        version = table.version
+        self._table = table
+        if version == self._version:
+            return
+        self._version = version
+        self._index = None
+        if self.mode == "lancedb":
+            return
+        if self.mode == "auto" and table.count_rows() > self.max_rows:
+            return
+        start = time.perf_counter()
+        self._index = NumpyIndex(table)
+        self._stats["builds"] += 1
+        self._stats["build_seconds"] += time.perf_counter() - start
+
+    def warm(self, table):
+        with self._lock:
+            self._sync(table)
+        return self
+
+    def search(self, table, embedding, k: int = 1, space=None):
+        with self._lock:
+            self._sync(table)
+            index = self._index
+        if index is None:
+            self._stats["lancedb"] += 1
+            return lancedb_search(
+                table, embedding, k, self.nprobes, self.refine_factor, space
+            )
+        self._stats["numpy"] += 1
+        return index.search(embedding, k, space)
+
+    def search_batch(self, table, embeddings, k: int = 1, space=None):
+        """One result list per embedding; vectorized when the NumPy index is used."""
+        with self._lock:
+            self._sync(table)
+            index = self._index
+        if index is None:
+            self._stats["lancedb"] += len(embeddings)
+            return [
+                lancedb_search(
+                    table, embedding, k, self.nprobes, self.refine_factor, space
+                )
+                for embedding in embeddings
+            ]
+        self._stats["numpy"] += len(embeddings)
+        return index.search_batch(embeddings, k, space)
+
+    def memory_bytes(self):
+        index = self._index
+        return index.nbytes if index is not None else 0
+
+    def stats(self):
+        stats = dict(self._stats)
+        stats["mode"] = self.mode
+        stats["engine"] = "numpy" if self._index is not None else "lancedb"
+        stats["rows"] = len(self._index) if self._index is not None else None
+        stats["version"] = self._version
+        return stats
@@ -0,0 +1,68 @@
+import numpy as np
+from minimax.app.stt.src.capture import SAMPLE_RATE, CHANNELS
+
+
+def pcm16_to_float32(data) -> np.ndarray:
+    """
+    Converts s16le mono PCM (bytes or an int16 array) to float32 in [-1, 1).
+    The int16 samples are viewed in place and the only allocation is the
+    float32 output.
+    """
+    if isinstance(data, np.ndarray):
+        samples = data.reshape(-1).view(np.int16)
+    else:
+        samples = np.frombuffer(data, dtype=np.int16)
+    audio = samples.astype(np.float32)
+    audio *= 1.0 / 32768.0
+    return audio
+
+
+def ffmpeg_decode(
+    data: bytes,
+    sr: int = SAMPLE_RATE,
+    input_format: str = "s16le",
+    input_sr: int = SAMPLE_RATE,
+    input_channels: int = CHANNELS,
+) -> np.ndarray:
+    """
+    Decodes audio through an ffmpeg subprocess, down-mixing and resampling to
+    mono s16le at `sr`. Requires the ffmpeg CLI and `ffmpeg-python`.
+    """
+    import ffmpeg
+
+    input_args = {"format": input_format, "ac": input_channels, "ar": input_sr}
+    if input_format == "s16le":
+        input_args["acodec"] = "pcm_s16le"
+    try:
+        out, _ = (
+            ffmpeg.input("pipe:0", **input_args)
+            .output("-", format="s16le", acodec="pcm_s16le", ac=1, ar=sr)
+            .run(
+                cmd=["ffmpeg", "-nostdin"],
+                capture_stdout=True,
+                capture_stderr=True,
+                input=data,
+            )
+        )
+    except Exception as e:
+        raise RuntimeError(f"Failed to load audio: {e}") from e
+    return pcm16_to_float32(out)
+
+
+def decode_audio(
+    data,
+    sr: int = SAMPLE_RATE,
+    input_format: str = "s16le",
+    input_sr: int = SAMPLE_RATE,
+    input_channels: int = CHANNELS,
+) -> np.ndarray:
+    """
+    Returns float32 mono audio at `sr`. Raw s16le mono input already at `sr`
+    (what the capture thread produces) is converted in-process; anything else
+    goes through ffmpeg.
+    """
+    if input_format == "s16le" and input_sr == sr and input_channels == 1:
+        return pcm16_to_float32(data)
+    if isinstance(data, np.ndarray):
+        data = data.tobytes()
+    return ffmpeg_decode(data, sr, input_format, input_sr, input_channels)
@@ -0,0 +1,130 @@
+import typing as t
+from functools import lru_cache
+import numpy as np
+from minimax.app.core.config import settings
+from minimax.app.stt.src.capture import SAMPLE_RATE
+
+
+class Transcript(t.NamedTuple):
+    text: str
+    no_speech_prob: float
+
+
+class WhisperBackend:
+    """openai-whisper in float32, on CUDA when available."""
+
+    name = "whisper"
+
+    def __init__(self, model_size: str = "base", threads: int = 0):
+        import torch
+        import whisper
+
+        if threads:
+            torch.set_num_threads(threads)
+        print(f"loading {self.name} model ({model_size})...")
+        self.model = self._prepare(
+            whisper.load_model(model_size, device=self._device())
+        )
+        print("model loaded!")
+
+    def _device(self):
+        import torch
+
+        return "cuda" if torch.cuda.is_available() else "cpu"
+
+    def _prepare(self, model):
+        return model
+
+    def transcribe(self, audio: np.ndarray, language: str = "en") -> Transcript:
+        from minimax.app.stt.src.decode import decode_utterance
+
+        result = decode_utterance(self.model, audio, language)
+        return Transcript(result.text, result.no_speech_prob)
+
+    def warm_up(self):
+        self.transcribe(np.zeros(SAMPLE_RATE, dtype=np.float32))
+        return self
+
+
+class QuantizedWhisperBackend(WhisperBackend):
+    """
+    openai-whisper with its Linear layers dynamically quantized to int8 on
+    CPU. Attention and MLP projections dominate decode time and quantize well.
+    """
+
+    name = "whisper-int8"
+
+    def _device(self):
+        # Dynamic quantization kernels only run on CPU
+        return "cpu"
+
+    def _prepare(self, model):
+        import torch
+        import whisper
+
+        # whisper.model.Linear only adds dtype casting in forward; the quantizer
+        # matches exact types, so present those layers as plain nn.Linear
+        for module in model.modules():
+            if type(module) is whisper.model.Linear:
+                module.__class__ = torch.nn.Linear
+        return torch.ao.quantization.quantize_dynamic(
+            model.eval(), {torch.nn.Linear}, dtype=torch.qint8
+        )
+
+
+class FasterWhisperBackend:
+    """CTranslate2 int8 Whisper via the optional faster-whisper package."""
+
+    name = "faster-whisper"
+
+    def __init__(self, model_size: str = "base", threads: int = 0):
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError as exc:
+            raise RuntimeError(
+                "The faster-whisper backend needs `pip install faster-whisper`"
+            ) from exc
+
+        print(f"loading {self.name} model ({model_size})...")
+        self.model = WhisperModel(
+            model_size, device="cpu", compute_type="int8", cpu_threads=threads
+        )
+        print("model loaded!")
+
+    def transcribe(self, audio: np.ndarray, language: str = "en") -> Transcript:
+        segments, _ = self.model.transcribe(
+            audio, language=language, beam_size=1, without_timestamps=True
+        )
+        segments = list(segments)
+        if not segments:
+            return Transcript("", 1.0)
+        return Transcript(
+            "".join(segment.text for segment in segments),
+            min(segment.no_speech_prob for segment in segments),
+        )
+
+    def warm_up(self):
+        self.transcribe(np.zeros(SAMPLE_RATE, dtype=np.float32))
+        return self
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (WhisperBackend, QuantizedWhisperBackend, FasterWhisperBackend)
+}
+
+
+@lru_cache(maxsize=None)
+def get_stt_backend(name: str = None, model_size: str = None, threads: int = None):
+    """
+    Returns a loaded and warmed-up STT backend. Each (name, size, threads)
+    combination is loaded once per process and kept for reuse.
+    """
+    name = name or settings.STT_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown STT backend {name!r}, choose from {list(BACKENDS)}")
+    backend = BACKENDS[name](
+        model_size or settings.STT_MODEL_SIZE,
+        settings.STT_THREADS if threads is None else threads,
+    )
+    return backend.warm_up()
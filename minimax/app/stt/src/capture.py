@@ -0,0 +1,264 @@
+import queue
+import threading
+import time
+import wave
+import numpy as np
+
+# Capture runs continuously in 30 ms frames, the largest frame webrtcvad takes
+SAMPLE_RATE = 16000
+FRAME_MS = 30
+CHUNK_SIZE = SAMPLE_RATE * FRAME_MS // 1000  # 480 samples per frame
+CHANNELS = 1
+VAD_MODE = 3
+VAD_PRE_ROLL = 300  # milliseconds of audio kept before speech starts
+VAD_SILENCE_LENGTH = 1000  # milliseconds of silence that end an utterance
+MAX_SEGMENT_LENGTH = 15000  # milliseconds before an utterance is force-ended
+RING_SECONDS = 30
+
+
+class FrameRingBuffer:
+    """
+    Preallocated ring of fixed-size int16 frames addressed by absolute frame
+    index. One thread writes, readers wait on new frames and can detect when
+    they fell so far behind that their frames were overwritten.
+    """
+
+    def __init__(self, capacity_frames: int, frame_samples: int = CHUNK_SIZE):
+        self.capacity = capacity_frames
+        self.frame_samples = frame_samples
+        self._frames = np.zeros((capacity_frames, frame_samples), dtype=np.int16)
+        self._cond = threading.Condition()
+        self.written = 0
+        self.closed = False
+
+    @property
+    def oldest(self):
+        """Index of the oldest frame that has not been overwritten yet."""
+        return max(self.written - self.capacity, 0)
+
+    def write(self, frame):
+        with self._cond:
+            self._frames[self.written % self.capacity] = frame
+            self.written += 1
+            self._cond.notify_all()
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def wait_for(self, index: int, timeout=None) -> bool:
+        """Blocks until frame `index` is written. False if the buffer closed first."""
+        with self._cond:
+            self._cond.wait_for(lambda: self.written > index or self.closed, timeout)
+            return self.written > index
+
+    def frame(self, index: int) -> np.ndarray:
+        """Returns a view of one frame; only valid until the writer laps it."""
+        if index < self.oldest:
+            raise IndexError(f"frame {index} was overwritten")
+        return self._frames[index % self.capacity]
+
+    def copy(self, start: int, stop: int) -> np.ndarray:
+        """Copies frames [start, stop) out as one contiguous int16 array."""
+        if start < self.oldest:
+            raise IndexError(f"frame {start} was overwritten")
+        first, last = start % self.capacity, stop % self.capacity
+        if stop - start <= self.capacity - first:
+            return self._frames[first : first + stop - start].reshape(-1).copy()
+        return np.concatenate([self._frames[first:], self._frames[:last]]).reshape(-1)
+
+
+class PyAudioSource:
+    """Microphone input, opened once for the life of the capture thread."""
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE, frame_samples: int = CHUNK_SIZE):
+        import pyaudio
+
+        self._pa = pyaudio.PyAudio()
+        self._stream = self._pa.open(
+            format=pyaudio.paInt16,
+            channels=CHANNELS,
+            rate=sample_rate,
+            input=True,
+            frames_per_buffer=frame_samples,
+        )
+
+    def read(self, frames: int) -> bytes:
+        return self._stream.read(frames, exception_on_overflow=False)
+
+    def close(self):
+        self._stream.stop_stream()
+        self._stream.close()
+        self._pa.terminate()
+
+
+class WavFileSource:
+    """
+    Reads a 16-bit mono WAV file as if it were the microphone, so the capture
+    and segmentation path can be driven from recordings. With realtime=True
+    reads are paced at the file's sample rate.
+    """
+
+    def __init__(self, path, sample_rate: int = SAMPLE_RATE, realtime: bool = False):
+        self._wav = wave.open(str(path), "rb")
+        if (
+            self._wav.getnchannels() != CHANNELS
+            or self._wav.getsampwidth() != 2
+            or self._wav.getframerate() != sample_rate
+        ):
+            self._wav.close()
+            raise ValueError(f"{path} must be 16-bit mono PCM at {sample_rate} Hz")
+        self.sample_rate = sample_rate
+        self.realtime = realtime
+
+    def read(self, frames: int) -> bytes:
+        data = self._wav.readframes(frames)
+        if self.realtime and data:
+            time.sleep(frames / self.sample_rate)
+        return data
+
+    def close(self):
+        self._wav.close()
+
+
+class AudioCapture(threading.Thread):
+    """Copies frames from an audio source into the ring buffer until stopped or EOF."""
+
+    def __init__(self, source, ring: FrameRingBuffer):
+        super().__init__(name="stt-capture", daemon=True)
+        self.source = source
+        self.ring = ring
+        self._stop_event = threading.Event()
+
+    def run(self):
+        frame_bytes = self.ring.frame_samples * 2
+        try:
+            while not self._stop_event.is_set():
+                data = self.source.read(self.ring.frame_samples)
+                if not data:
+                    break
+                if len(data) < frame_bytes:
+                    # Zero-pad the final partial frame of a finite source
+                    data = data + bytes(frame_bytes - len(data))
+                self.ring.write(np.frombuffer(data, dtype=np.int16))
+        finally:
+            self.source.close()
+            self.ring.close()
+
+    def stop(self):
+        self._stop_event.set()
+
+
+class SpeechSegmenter(threading.Thread):
+    """
+    Runs VAD over frames as they land in the ring buffer and puts each
+    utterance on `segments` as an int16 array, padded with VAD_PRE_ROLL of
+    audio before the first speech frame and VAD_SILENCE_LENGTH after the last.
+    `None` is put on the queue once the source is exhausted.
+    """
+
+    def __init__(
+        self,
+        ring: FrameRingBuffer,
+        is_speech=None,
+        sample_rate: int = SAMPLE_RATE,
+        pre_roll_ms: int = VAD_PRE_ROLL,
+        hangover_ms: int = VAD_SILENCE_LENGTH,
+        max_segment_ms: int = MAX_SEGMENT_LENGTH,
+        max_queued: int = 8,
+    ):
+        super().__init__(name="stt-segmenter", daemon=True)
+        if is_speech is None:
+            import webrtcvad
+
+            is_speech = webrtcvad.Vad(VAD_MODE).is_speech
+        frame_ms = ring.frame_samples * 1000 // sample_rate
+        self.ring = ring
+        self.is_speech = is_speech
+        self.sample_rate = sample_rate
+        self.pre_roll_frames = pre_roll_ms // frame_ms
+        self.hangover_frames = hangover_ms // frame_ms
+        self.max_segment_frames = min(max_segment_ms // frame_ms, ring.capacity // 2)
+        self.segments = queue.Queue(maxsize=max_queued)
+        self.dropped_frames = 0
+        self.emitted = 0
+
+    def _emit(self, start, stop):
+        self.segments.put(self.ring.copy(start, stop))
+        self.emitted += 1
+
+    def run(self):
+        index = 0
+        start = last_speech = None
+        # Pre-roll never reaches back into audio already emitted, e.g. after
+        # an utterance was split at max_segment_ms
+        emitted_until = 0
+        while self.ring.wait_for(index):
+            if index < self.ring.oldest:
+                # Fell a full ring behind; skip ahead and drop the partial utterance
+                self.dropped_frames += self.ring.oldest - index
+                index = self.ring.oldest
+                start = None
+                continue
+
+            frame = self.ring.frame(index)
+            if self.is_speech(frame.tobytes(), self.sample_rate):
+                if start is None:
+                    start = max(
+                        index - self.pre_roll_frames, self.ring.oldest, emitted_until
+                    )
+                last_speech = index
+            if start is not None and (
+                index - last_speech >= self.hangover_frames
+                or index + 1 - start >= self.max_segment_frames
+            ):
+                self._emit(start, index + 1)
+                emitted_until = index + 1
+                start = None
+            index += 1
+
+        if start is not None:
+            self._emit(start, index)
+        self.segments.put(None)
+
+
+class SpeechStream:
+    """
+    Continuous capture plus streaming segmentation. The source is opened once
+    and keeps filling the ring buffer while earlier utterances are decoded.
+    Iterate to receive int16 utterances until the source ends.
+    """
+
+    def __init__(self, source, ring_seconds: int = RING_SECONDS, **segmenter_kwargs):
+        frames_per_second = SAMPLE_RATE // CHUNK_SIZE
+        self.ring = FrameRingBuffer(ring_seconds * frames_per_second, CHUNK_SIZE)
+        self.capture = AudioCapture(source, self.ring)
+        self.segmenter = SpeechSegmenter(self.ring, **segmenter_kwargs)
+
+    def start(self):
+        self.capture.start()
+        self.segmenter.start()
+        return self
+
+    def stop(self):
+        self.capture.stop()
+
+    def __iter__(self):
+        while (segment := self.segmenter.segments.get()) is not None:
+            yield segment
+
+    def stats(self):
+        return {
+            "frames_captured": self.ring.written,
+            "frames_dropped": self.segmenter.dropped_frames,
+            "segments": self.segmenter.emitted,
+            "segments_queued": self.segmenter.segments.qsize(),
+        }
+
+
+def iter_wav_segments(path, realtime: bool = False, **segmenter_kwargs):
+    """Yields the utterances found in a WAV file, using the live capture path."""
+    yield from SpeechStream(
+        WavFileSource(path, realtime=realtime), **segmenter_kwargs
+    ).start()
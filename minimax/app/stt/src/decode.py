@@ -0,0 +1,87 @@
+import math
+from functools import lru_cache
+import numpy as np
+import torch
+import torch.nn.functional as F
+import whisper
+from whisper.audio import (
+    HOP_LENGTH,
+    N_FFT,
+    N_FRAMES,
+    N_SAMPLES,
+    SAMPLE_RATE,
+    mel_filters,
+)
+
+# Utterances up to this long use the short decode path
+SHORT_UTTERANCE_SECONDS = 8.0
+# Silence appended after speech before the STFT, so edge frames match the padded path
+MEL_MARGIN_SECONDS = 0.2
+# Token budget for short commands: generous for speech, far below the 224 default
+TOKENS_PER_SECOND = 8
+MIN_SAMPLE_LEN = 16
+# log10 of the clamp whisper applies before taking the log
+_LOG_FLOOR = -10.0
+
+
+@lru_cache(maxsize=None)
+def stft_window(device):
+    return torch.hann_window(N_FFT, device=device)
+
+
+def short_log_mel_spectrogram(
+    audio, n_mels: int = 80, device=None, margin_seconds: float = MEL_MARGIN_SECONDS
+):
+    """
+    Returns the same (n_mels, N_FRAMES) log-mel input as
+    `log_mel_spectrogram(pad_or_trim(audio))`, but only runs the STFT over the
+    speech plus a short margin. The frames that would come from the zero
+    padding are all equal to the clamped floor, so they are filled in directly.
+    """
+    if isinstance(audio, np.ndarray):
+        audio = torch.from_numpy(audio)
+    if device is not None:
+        audio = audio.to(device)
+    n_samples = min(audio.shape[-1] + int(margin_seconds * SAMPLE_RATE), N_SAMPLES)
+    audio = F.pad(audio[:n_samples], (0, n_samples - min(audio.shape[-1], n_samples)))
+
+    stft = torch.stft(
+        audio, N_FFT, HOP_LENGTH, window=stft_window(audio.device), return_complex=True
+    )
+    magnitudes = stft[..., :-1].abs() ** 2
+    mel_spec = mel_filters(audio.device, n_mels) @ magnitudes
+
+    log_spec = torch.clamp(mel_spec, min=1e-10).log10()
+    floor = log_spec.max() - 8.0
+    log_spec = torch.maximum(log_spec, floor)
+
+    fill = torch.clamp(floor, min=_LOG_FLOOR)
+    full = fill.expand(n_mels, N_FRAMES).clone()
+    frames = min(log_spec.shape[-1], N_FRAMES)
+    full[:, :frames] = log_spec[:, :frames]
+    return (full + 4.0) / 4.0
+
+
+def decode_utterance(model, audio: np.ndarray, language: str = "en"):
+    """
+    Decodes one utterance. Short commands skip the 30 s STFT and decode greedily
+    without timestamps under a token budget sized to their duration; longer
+    audio takes the standard pad-to-30 s path.
+    """
+    duration = len(audio) / SAMPLE_RATE
+    if duration <= SHORT_UTTERANCE_SECONDS:
+        mel = short_log_mel_spectrogram(audio, model.dims.n_mels, model.device)
+        options = whisper.DecodingOptions(
+            language=language,
+            fp16=False,
+            without_timestamps=True,
+            sample_len=max(MIN_SAMPLE_LEN, math.ceil(duration * TOKENS_PER_SECOND)),
+        )
+    else:
+        mel = whisper.log_mel_spectrogram(
+            whisper.pad_or_trim(audio), model.dims.n_mels
+        ).to(model.device)
+        options = whisper.DecodingOptions(language=language, fp16=False)
+
+    with torch.no_grad():  # disable gradient tracking for efficiency
+        return whisper.decode(model, mel, options)
@@ -1,12 +1,8 @@
 # import config
-import whisper
-import torch
+import base64
 import numpy as np
-import ffmpeg
 import io
-import pyaudio
 import time
-import webrtcvad
 import pyttsx3
 import requests
 import subprocess
@@ -14,7 +10,21 @@ import threading
 import asyncio
 import sounddevice as sd
 import json
+from functools import lru_cache
 from minimax.mqtt_publisher import publish_message
+from minimax.app.stt.src.capture import (
+    SAMPLE_RATE,
+    CHUNK_SIZE,
+    CHANNELS,
+    VAD_MODE,
+    VAD_SILENCE_LENGTH,
+    PyAudioSource,
+    SpeechStream,
+)
+from minimax.app.stt.src.audio import decode_audio
+from minimax.app.stt.src.backends import get_stt_backend
+from minimax.app.stt.src.pipeline import Pipeline
+from minimax.app.core.config import settings
 
 wake_words = {
     "mini max": "Mini Max",
@@ -62,28 +72,23 @@ def play_video(video_filename):
     )
 
 
-engine = pyttsx3.init()
+@lru_cache(maxsize=1)
+def get_tts_engine():
+    engine = pyttsx3.init()
 
-# change voice to male
-voices = engine.getProperty("voices")
-for voice in voices:
-    if voice in voices:
-        # print(voice.gender)
-        # print(voice.languages)
-        if voice.languages == ["en_GB"] and voice.name == "Daniel":
-            print(voice)
-            #     print(voice.gender)
-            engine.setProperty("voice", voice.id)
-            # engine.say("Hello, I am Alfred. How can I help you today sir?")
-            # engine.runAndWait()
-
-print("loading model...")
-model = whisper.load_model("base")
-device = torch.device(
-    "cuda" if torch.cuda.is_available() else "cpu"
-)  # check if GPU is available
-model.to(device)  # move model to device (GPU or CPU)
-print("model loaded!")
+    # change voice to male
+    voices = engine.getProperty("voices")
+    for voice in voices:
+        if voice in voices:
+            # print(voice.gender)
+            # print(voice.languages)
+            if voice.languages == ["en_GB"] and voice.name == "Daniel":
+                print(voice)
+                #     print(voice.gender)
+                engine.setProperty("voice", voice.id)
+                # engine.say("Hello, I am Alfred. How can I help you today sir?")
+                # engine.runAndWait()
+    return engine
 
 
 def exact_div(x, y):
@@ -92,7 +97,6 @@ def exact_div(x, y):
 
 
 # hard-coded audio hyperparameters
-SAMPLE_RATE = 16000
 N_FFT = 400
 N_MELS = 80
 HOP_LENGTH = 160
@@ -101,21 +105,17 @@ N_SAMPLES = CHUNK_LENGTH * SAMPLE_RATE  # 480000: number of samples in a chunk
 N_FRAMES = exact_div(
     N_SAMPLES, HOP_LENGTH
 )  # 3000: number of frames in a mel spectrogram input
-CHUNK_SIZE = 480
-# CHUNK_SIZE = 1024
-FORMAT = pyaudio.paInt16
-CHANNELS = 1
 CAPTURE_DURATION = 5  # seconds
 # VAD_THRESHOLD = 0.01
 VAD_THRESHOLD = 200
-VAD_MODE = 3
-VAD_SILENCE_LENGTH = 1000  # milliseconds
-
-# Create a VAD object with the desired mode
-vad = webrtcvad.Vad(VAD_MODE)
 
 
-def load_audio_stream(stream, sr: int = SAMPLE_RATE):
+def load_audio_stream(
+    stream,
+    sr: int = SAMPLE_RATE,
+    input_format: str = "s16le",
+    input_sr: int = SAMPLE_RATE,
+):
     """
     Read an audio stream as mono waveform, resampling as necessary
     Parameters
@@ -124,132 +124,145 @@ def load_audio_stream(stream, sr: int = SAMPLE_RATE):
         The audio stream to read
     sr: int
         The sample rate to resample the audio if necessary
+    input_format: str
+        ffmpeg format of the stream; s16le at `sr` is decoded without ffmpeg
+    input_sr: int
+        Sample rate of the stream
     Returns
     -------
     A NumPy array containing the audio waveform, in float32 dtype.
     """
-    try:
-        # This launches a subprocess to decode audio while down-mixing and resampling as necessary.
-        # Requires the ffmpeg CLI and `ffmpeg-python` package to be installed.
-        out, _ = (
-            ffmpeg.input("pipe:0", format="s16le", acodec="pcm_s16le", ac=1, ar=sr)
-            .output("-", format="s16le", acodec="pcm_s16le", ac=1, ar=sr)
-            .run(
-                cmd=["ffmpeg", "-nostdin"],
-                capture_stdout=True,
-                capture_stderr=True,
-                input=stream.read(),
+    audio = decode_audio(stream.read(), sr, input_format, input_sr)
+    print("audio loaded!")
+    return audio
+
+
+NO_ANSWER = "I have no idea what you are saying. Use your batman voice"
+
+
+def transcribe_segment(stt, segment):
+    """Transcription stage: an utterance in, the command after the wake word out."""
+    # Captured frames are already s16le mono at SAMPLE_RATE, no ffmpeg needed
+    audio = decode_audio(segment)
+    # Short commands skip the 30 s padding and decode under a small token budget
+    result = stt.transcribe(audio)
+
+    if result.no_speech_prob >= 0.5:
+        return None
+    print(result.text)
+
+    # Check for any wake word in the text
+    lowered = result.text.lower()
+    for wake_word, assistant_name in wake_words.items():
+        if wake_word.lower() in lowered:
+            # Remove the wake word from the text
+            text = lowered.replace(wake_word.lower(), "").strip()
+            print(
+                f"Wake word '{wake_word}' detected. Assistant identity: {assistant_name}"
             )
-        )
-        print("audio loaded!")
-    except Exception as e:
-        raise RuntimeError(f"Failed to load audio: {e}") from e
+            print(f"Input Text: {text}")
+            return text
+    return None
 
-    return np.frombuffer(out, np.int16).flatten().astype(np.float32) / 32768.0
 
+@lru_cache(maxsize=1)
+def get_http_session():
+    """Keep-alive session so every command reuses one pooled connection to the API."""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=4)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
 
-def start_audio_stream():
-    # Create an instance of PyAudio
-    pa = pyaudio.PyAudio()
 
-    # Open a microphone stream
-    stream = pa.open(
-        format=FORMAT,
-        channels=CHANNELS,
-        rate=SAMPLE_RATE,
-        input=True,
-        frames_per_buffer=CHUNK_SIZE,
+def resolve_intent_http(text):
+    data = {"space": "chatbot", "content": text}
+    resp = get_http_session().post(
+        settings.STT_API_URL, json=data, timeout=settings.STT_API_TIMEOUT
     )
-    # Create a bytes buffer to hold the audio data
-    audio_buffer = io.BytesIO()
+    resp.raise_for_status()
+    answer = resp.json()
+    # The API sends the compiled payload base64-encoded
+    if answer.get("payload"):
+        answer["payload"] = base64.b64decode(answer["payload"])
+    return answer
+
+
+def resolve_intent_in_process(text):
+    # Imported here so the HTTP mode never loads the embedding model
+    from minimax.app.services.intents import get_intent_resolver
+
+    return get_intent_resolver().resolve(text, space="chatbot")
 
-    silence_start_time = None
+
+INTENT_RESOLVERS = {
+    "http": resolve_intent_http,
+    "in_process": resolve_intent_in_process,
+}
+
+
+def resolve_intent(text):
+    """Intent stage: a command in, the chat answer out, over HTTP or in-process."""
+    answer = INTENT_RESOLVERS[settings.STT_INTENT_MODE](text)
+    print(answer)
+    return answer
+
+
+def dispatch_action(answer):
+    """Action stage: publishes the answer's action, returns what to say."""
+    if answer["answer"] == "Please connect me to bubble network":
+        return NO_ANSWER
+    if answer.get("action"):
+        print(answer["action"], " triggering this action")
+        # The payload compiled at ingest (JSON or msgpack); rows stored
+        # before payloads existed fall back to the JSON text
+        payload = answer.get("payload") or answer.get("message_data")
+        publish_message(topic=answer["action"], message=payload)
+    return answer["answer"] or None
+
+
+def speak(text):
+    """Speech stage. The engine is created on, and only used from, this thread."""
+    engine = get_tts_engine()
+    engine.say(text)
+    engine.runAndWait()
+
+
+def report_stats(speech, pipeline, interval):
     while True:
-        data = stream.read(CHUNK_SIZE)
-        # Check if there is speech activity in the current chunk
-        is_speech = vad.is_speech(data, SAMPLE_RATE)
-        if is_speech:
-            silence_start_time = None
-            # Write the audio data to the current audio buffer
-            audio_buffer.write(data)
-        # If there is no speech activity and we are not already in a silence period, start a new one
-        elif silence_start_time is None:
-            silence_start_time = time.monotonic()
-        # If there is no speech activity and we are in a silence period, check if the period is long enough
-        elif time.monotonic() - silence_start_time > VAD_SILENCE_LENGTH / 1000:
-            # If the silence period is long enough, assume the current audio buffer is complete
-            if audio_buffer.tell() > 0:
-                print("End of speech detected")
-                # Stop capturing and clean up
-                break
-
-    stream.stop_stream()
-    stream.close()
-    pa.terminate()
-    # Reset the buffer position to the beginning
-    audio_buffer.seek(0)
-    return audio_buffer
+        time.sleep(interval)
+        print(
+            "[STT] stats "
+            + json.dumps({"capture": speech.stats(), "stages": pipeline.stats()})
+        )
 
 
 def run_listener():
-    while True:
-        print("starting audio stream...")
-        new_stream = start_audio_stream()
-        print("loading audio...")
-        audio = load_audio_stream(new_stream)
-        print("processing audio...")
-        audio = whisper.pad_or_trim(audio)
-        mel = whisper.log_mel_spectrogram(audio).to(model.device)
-        options = whisper.DecodingOptions(language="en", fp16=False)
-
-        print("decoding...")
-
-        with torch.no_grad():  # disable gradient tracking for efficiency
-            result = whisper.decode(model, mel, options)
-
-        print("processing...")
-
-        if result.no_speech_prob < 0.5:
-            print(result.text)
-
-            # Check for any wake word in the text
-            detected_wake_word = None
-            for wake_word, assistant_name in wake_words.items():
-                if wake_word.lower() in result.text.lower():
-                    detected_wake_word = wake_word
-                    assistant_identity = assistant_name
-                    break
-
-            if detected_wake_word:
-                # if detected_wake_word:
-                # Remove the wake word from the text
-                text = result.text.lower().replace(detected_wake_word, "").strip()
-                print(
-                    f"Wake word '{detected_wake_word}' detected. Assistant identity: {assistant_identity}"
-                )
-                print(f"Input Text: {text}")
-
-                data = {"space": "chatbot", "content": text}
-                resp = requests.post("http://localhost:8000/api/text/chat/", json=data)
-                print(resp.json())
-                if resp.json()["answer"] != "Please connect me to bubble network":
-                    if "action" in resp.json() and resp.json()["action"] != "":
-                        print(resp.json()["action"], " triggering this action")
-                        publish_message(
-                            topic=resp.json()["action"],
-                            message=resp.json()["message_data"],
-                        )
-                        if resp.json()["answer"] != "":
-                            engine.say(resp.json()["answer"])
-                            engine.runAndWait()
-                    else:
-                        engine.say(resp.json()["answer"])
-                        engine.runAndWait()
-                else:
-                    engine.say(
-                        "I have no idea what you are saying. Use your batman voice"
-                    )
-                    engine.runAndWait()
+    # Loaded once and warmed up before the first utterance
+    stt = get_stt_backend()
+    print("starting audio stream...")
+    # The microphone stays open and keeps capturing while utterances are
+    # decoded, and each stage below runs on its own thread, so speaking an
+    # answer no longer stops the next command from being heard and decoded
+    speech = SpeechStream(PyAudioSource()).start()
+    pipeline = Pipeline(
+        speech.segmenter.segments,
+        [
+            ("transcribe", lambda segment: transcribe_segment(stt, segment)),
+            ("intent", resolve_intent),
+            ("action", dispatch_action),
+            ("speak", speak),
+        ],
+        max_queued=settings.STT_STAGE_QUEUE_SIZE,
+    ).start()
+    if settings.STT_STATS_INTERVAL > 0:
+        threading.Thread(
+            target=report_stats,
+            args=(speech, pipeline, settings.STT_STATS_INTERVAL),
+            daemon=True,
+        ).start()
+    pipeline.join()
+    return pipeline
 
 
 if __name__ == "__main__":
@@ -0,0 +1,84 @@
+import queue
+import threading
+import time
+from minimax.app.core.metrics import LatencyHistogram
+
+
+class Stage(threading.Thread):
+    """
+    One pipeline stage: takes items off its inbox, runs `fn` and puts the
+    result on the next stage's inbox. Returning None drops the item. Both
+    queues are bounded, so a slow stage blocks the ones before it instead of
+    letting work pile up. None on the inbox shuts the stage down and is
+    passed on.
+    """
+
+    def __init__(self, name: str, fn, inbox: queue.Queue, outbox: queue.Queue = None):
+        super().__init__(name=f"stt-{name}", daemon=True)
+        self.stage_name = name
+        self.fn = fn
+        self.inbox = inbox
+        self.outbox = outbox
+        self.latency = LatencyHistogram()
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+
+    def run(self):
+        while (item := self.inbox.get()) is not None:
+            start = time.perf_counter()
+            try:
+                result = self.fn(item)
+            except Exception as exc:
+                self.errors += 1
+                print(f"[STT] {self.stage_name} failed: {exc}")
+                continue
+            finally:
+                self.latency.observe(time.perf_counter() - start)
+            self.processed += 1
+            if self.outbox is None:
+                continue
+            if result is None:
+                self.dropped += 1
+            else:
+                self.outbox.put(result)
+        if self.outbox is not None:
+            self.outbox.put(None)
+
+    def stats(self):
+        return {
+            "queue_depth": self.inbox.qsize(),
+            "queue_capacity": self.inbox.maxsize,
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "latency": self.latency.snapshot(),
+        }
+
+
+class Pipeline:
+    """
+    Chains stages with bounded queues. `source` is the queue the first stage
+    reads from, e.g. the speech segmenter's output.
+    """
+
+    def __init__(self, source: queue.Queue, stages, max_queued: int = 4):
+        self.stages = []
+        inbox = source
+        for index, (name, fn) in enumerate(stages):
+            last = index == len(stages) - 1
+            outbox = None if last else queue.Queue(maxsize=max_queued)
+            self.stages.append(Stage(name, fn, inbox, outbox))
+            inbox = outbox
+
+    def start(self):
+        for stage in self.stages:
+            stage.start()
+        return self
+
+    def join(self, timeout=None):
+        for stage in self.stages:
+            stage.join(timeout)
+
+    def stats(self):
+        return {stage.stage_name: stage.stats() for stage in self.stages}
@@ -12,15 +12,12 @@ import os
 from pathlib import Path
 import logging
 
-# Import your existing modules
-from minimax.app.stt.src.main import run_listener
-import uvicorn
-from minimax.mqtt_worker import start_mqtt
+# Only lightweight modules are imported here. The STT worker, API server,
+# MQTT worker and database init pull in Whisper, torch, sentence-transformers,
+# LanceDB and pydantic-settings, so they are imported inside the commands that
+# need them to keep `minimax --version`, `status` and `stop` fast.
 from minimax.mqtt_utils import ensure_mosquitto_docker, ensure_ffmpeg
 from minimax import __version__
-from minimax.app.scripts.init_mini_max import remove_init, initialize
-import lancedb
-from minimax.app.core.config import settings
 
 # Set up logging
 logging.basicConfig(
@@ -72,6 +69,8 @@ def api(ctx, host, port, reload):
     if verbose:
         click.echo(f"[FASTAPI] Starting API server on {host}:{port}")
 
+    import uvicorn
+
     try:
         uvicorn.run(
             "minimax.app.main:app",  # Use string import instead of imported object
@@ -92,8 +91,13 @@ def api(ctx, host, port, reload):
     type=click.Path(exists=True, file_okay=False),
     help="Path to custom MQTT plugins directory",
 )
+@click.option(
+    "--hot-reload",
+    is_flag=True,
+    help="Reload changed plugins in --plugins-dir without reconnecting",
+)
 @click.pass_context
-def mqtt(ctx, skip_setup, plugins_dir):
+def mqtt(ctx, skip_setup, plugins_dir, hot_reload):
     """Start the MQTT worker."""
     verbose = ctx.obj.get("verbose", False)
 
@@ -111,8 +115,10 @@ def mqtt(ctx, skip_setup, plugins_dir):
         if plugins_dir:
             click.echo(f"[MQTT] Using plugins dir: {plugins_dir}")
 
+    from minimax.mqtt_worker import start_mqtt
+
     try:
-        start_mqtt(plugins_dir=plugins_dir)
+        start_mqtt(plugins_dir=plugins_dir, hot_reload=hot_reload)
     except Exception as e:
         click.echo(f"❌ MQTT Error: {e}", err=True)
         sys.exit(1)
@@ -127,6 +133,8 @@ def stt(ctx):
     if verbose:
         click.echo("[STT] Starting STT worker...")
 
+    from minimax.app.stt.src.main import run_listener
+
     try:
         run_listener()
     except Exception as e:
@@ -134,8 +142,11 @@ def stt(ctx):
         sys.exit(1)
 
 
-def _initialize_database_if_needed(init_file_path=None, verbose=False):
-    """Initialize the database with the specified init file if needed."""
+def _initialize_database_if_needed(init_file_path=None, verbose=False, rebuild=False):
+    """Sync the database with the specified init file, or rebuild it from scratch."""
+    from minimax.app.core.config import settings
+    from minimax.app.scripts.init_mini_max import remove_init, initialize, sync
+
     try:
         # Use the provided init_file_path or fall back to settings
         current_init_file = init_file_path or settings.INIT_FILE
@@ -145,34 +156,18 @@ def _initialize_database_if_needed(init_file_path=None, verbose=False):
                 f"[DB] Checking database initialization with: {current_init_file}"
             )
 
-        # Connect to LanceDB
-        db = lancedb.connect(settings.DB_PATH)
-
-        # Check if table exists and has data
-        table_exists = "init_qa_action" in db.table_names()
-        needs_reinit = True
-        # needs_reinit = False
-
-        # if table_exists:
-        #     table = db.open_table("init_qa_action")
-        #     count = table.count_rows()
-
-        #     # Reinitialize if empty or if we're using a different init file than test_text.csv
-        #     if count == 0 or init_file_path:
-        #         needs_reinit = True
-        # else:
-        #     needs_reinit = True
-
-        if needs_reinit:
+        if rebuild:
             if verbose:
-                click.echo("[DB] Initializing database...")
+                click.echo("[DB] Rebuilding database...")
             remove_init()
             initialize(current_init_file)
-            if verbose:
-                click.echo("[DB] Database initialization complete")
         else:
             if verbose:
-                click.echo("[DB] Database already initialized")
+                click.echo("[DB] Syncing database with init file...")
+            # Only new or changed rows are embedded; unchanged rows are kept
+            sync(current_init_file)
+        if verbose:
+            click.echo("[DB] Database initialization complete")
 
     except Exception as e:
         if verbose:
@@ -201,8 +196,28 @@ def _initialize_database_if_needed(init_file_path=None, verbose=False):
     type=click.Path(exists=True, file_okay=False),
     help="Path to custom MQTT plugins directory",
 )
+@click.option(
+    "--rebuild-db",
+    is_flag=True,
+    help="Drop and re-embed the whole init file instead of syncing changes",
+)
+@click.option(
+    "--hot-reload",
+    is_flag=True,
+    help="Reload changed plugins in --plugins-dir without reconnecting",
+)
 @click.pass_context
-def start(ctx, api_host, api_port, skip_mqtt_setup, services, init_file, plugins_dir):
+def start(
+    ctx,
+    api_host,
+    api_port,
+    skip_mqtt_setup,
+    services,
+    init_file,
+    plugins_dir,
+    rebuild_db,
+    hot_reload,
+):
     """Start all services (or specified services) in parallel."""
     verbose = ctx.obj.get("verbose", True)
 
@@ -216,7 +231,7 @@ def start(ctx, api_host, api_port, skip_mqtt_setup, services, init_file, plugins
 
     # Initialize database before starting services
     try:
-        _initialize_database_if_needed(init_file, verbose)
+        _initialize_database_if_needed(init_file, verbose, rebuild=rebuild_db)
     except Exception as e:
         click.echo(f"❌ Database initialization failed: {e}", err=True)
         sys.exit(1)
@@ -245,7 +260,8 @@ def start(ctx, api_host, api_port, skip_mqtt_setup, services, init_file, plugins
                 click.echo(f"[MQTT] Using plugins dir: {plugins_dir}")
             logger.info(f"Using custom init file: {init_file}")
         p_mqtt = multiprocessing.Process(
-            target=_run_mqtt_process, args=(skip_mqtt_setup, verbose, plugins_dir)
+            target=_run_mqtt_process,
+            args=(skip_mqtt_setup, verbose, plugins_dir, hot_reload),
         )
         processes.append(("MQTT", p_mqtt))
 
@@ -379,6 +395,8 @@ def _run_api_process(host, port, verbose, init_file=None):
         if verbose:
             print(f"[API] Using custom init file: {init_file_path}")
 
+    import uvicorn
+
     uvicorn.run(
         "minimax.app.main:app",  # Use string import instead of imported object
         host=host,
@@ -387,16 +405,20 @@ def _run_api_process(host, port, verbose, init_file=None):
     )
 
 
-def _run_mqtt_process(skip_setup, verbose, plugins_dir=None):
+def _run_mqtt_process(skip_setup, verbose, plugins_dir=None, hot_reload=False):
     """Run MQTT worker in a separate process."""
+    from minimax.mqtt_worker import start_mqtt
+
     if not skip_setup:
         ensure_mosquitto_docker()
         ensure_ffmpeg()
-    start_mqtt(plugins_dir=plugins_dir)
+    start_mqtt(plugins_dir=plugins_dir, hot_reload=hot_reload)
 
 
 def _run_stt_process(verbose):
     """Run STT worker in a separate process."""
+    from minimax.app.stt.src.main import run_listener
+
     run_listener()
 
 
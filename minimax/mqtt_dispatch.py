@@ -0,0 +1,120 @@
+import asyncio
+import inspect
+import queue
+import threading
+import time
+from minimax.app.core.metrics import LatencyHistogram
+
+
+class PluginDispatcher:
+    """
+    Runs one plugin's MQTT callbacks off paho's network thread.
+
+    Messages are spread over `workers` lanes, each a bounded queue drained by
+    its own thread. A topic always maps to the same lane, so messages on one
+    topic are handled in order while different topics run concurrently. When
+    a lane is full, `overflow="block"` makes the network thread wait for room
+    and `overflow="drop"` discards the message. Coroutine callbacks are run
+    on an event loop owned by the lane.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        workers: int = 1,
+        max_queued: int = 100,
+        overflow: str = "block",
+    ):
+        if overflow not in ("block", "drop"):
+            raise ValueError(f"overflow must be 'block' or 'drop', not {overflow!r}")
+        self.name = name
+        self.overflow = overflow
+        self.lag = LatencyHistogram()
+        self.latency = LatencyHistogram()
+        self.handled = 0
+        self.dropped = 0
+        self.errors = 0
+        self._lanes = [queue.Queue(maxsize=max_queued) for _ in range(max(workers, 1))]
+        self._threads = [
+            threading.Thread(
+                target=self._work, args=(lane,), name=f"mqtt-{name}-{i}", daemon=True
+            )
+            for i, lane in enumerate(self._lanes)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, callback, client, userdata, message):
+        """Called on the network thread; only enqueues."""
+        lane = self._lanes[hash(message.topic) % len(self._lanes)]
+        item = (time.perf_counter(), callback, client, userdata, message)
+        if self.overflow == "drop":
+            try:
+                lane.put_nowait(item)
+            except queue.Full:
+                self.dropped += 1
+        else:
+            lane.put(item)
+
+    def wrap(self, callback):
+        """Returns a paho callback that hands messages to this dispatcher."""
+
+        def dispatch(client, userdata, message):
+            self.submit(callback, client, userdata, message)
+
+        return dispatch
+
+    def _work(self, lane):
+        loop = None
+        while (item := lane.get()) is not None:
+            received, callback, client, userdata, message = item
+            start = time.perf_counter()
+            self.lag.observe(start - received)
+            try:
+                result = callback(client, userdata, message)
+                if inspect.isawaitable(result):
+                    loop = loop or asyncio.new_event_loop()
+                    loop.run_until_complete(result)
+                self.handled += 1
+            except Exception as exc:
+                self.errors += 1
+                print(f"[MQTT] Plugin {self.name} failed on {message.topic}: {exc}")
+            finally:
+                self.latency.observe(time.perf_counter() - start)
+        if loop is not None:
+            loop.close()
+
+    def stop(self, timeout: float = 5.0):
+        for lane in self._lanes:
+            lane.put(None)
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def stats(self):
+        return {
+            "workers": len(self._lanes),
+            "queued": sum(lane.qsize() for lane in self._lanes),
+            "handled": self.handled,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "queue_lag": self.lag.snapshot(),
+            "handler_latency": self.latency.snapshot(),
+        }
+
+
+class DispatchingClient:
+    """
+    The client handed to a plugin's register(). It behaves like the paho
+    client, except callbacks added with message_callback_add run on the
+    plugin's dispatcher instead of the network thread.
+    """
+
+    def __init__(self, client, dispatcher: PluginDispatcher):
+        self._client = client
+        self._dispatcher = dispatcher
+
+    def message_callback_add(self, sub, callback):
+        self._client.message_callback_add(sub, self._dispatcher.wrap(callback))
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
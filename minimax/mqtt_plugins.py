@@ -0,0 +1,257 @@
+import importlib
+import os
+import pkgutil
+import sys
+import threading
+from minimax.app.core.config import settings
+from minimax.mqtt_dispatch import DispatchingClient, PluginDispatcher
+from minimax.mqtt_router import TopicRouter
+
+
+class Plugin:
+    """A plugin module plus everything it registered on the client."""
+
+    def __init__(self, name, module):
+        self.name = name
+        self.module = module
+        self.subscriptions = {}
+        self.dispatcher = None
+
+
+class RegisteringClient(DispatchingClient):
+    """
+    The client handed to a plugin's register(). Subscriptions are recorded
+    instead of sent, so the registry can send them all in one SUBSCRIBE and
+    restore them after a reconnect. Callbacks go into the shared topic router
+    and run on the plugin's dispatcher.
+    """
+
+    def __init__(self, client, plugin: Plugin, router: TopicRouter):
+        super().__init__(client, plugin.dispatcher)
+        self._plugin = plugin
+        self._router = router
+
+    def subscribe(self, topic, qos=0, *args, **kwargs):
+        topics = topic if isinstance(topic, list) else [(topic, qos)]
+        for entry in topics:
+            if isinstance(entry, str):
+                entry = (entry, qos)
+            self._plugin.subscriptions[entry[0]] = entry[1]
+        return (0, None)
+
+    def message_callback_add(self, sub, callback):
+        """paho-compatible: the callback gets paho's message as-is."""
+        self._router.add(
+            sub, callback, raw=True, owner=self._plugin, dispatcher=self._dispatcher
+        )
+
+    def message_callback_remove(self, sub):
+        for route in list(self._router.routes):
+            if route.owner is self._plugin and route.filter == sub:
+                self._router.remove(route)
+
+    def route(self, topic_filter: str, handler=None, decoder=None, qos: int = 0):
+        """
+        Subscribes to topic_filter (wildcards and "$share/<group>/..." allowed)
+        and routes matching messages to handler(client, userdata, routed),
+        where routed is a RoutedMessage whose payload went through decoder
+        ("raw", "text", "json" or any callable taking bytes). Works as a
+        decorator when handler is omitted.
+        """
+
+        def add(handler):
+            self.subscribe(topic_filter, qos)
+            self._router.add(
+                topic_filter,
+                handler,
+                decoder,
+                owner=self._plugin,
+                dispatcher=self._dispatcher,
+            )
+            return handler
+
+        return add if handler is None else add(handler)
+
+
+class PluginRegistry:
+    """
+    Discovers and imports plugins once, registers them once, and only
+    re-sends their subscriptions on reconnect. With a plugins dir, changed
+    top-level plugin modules can be reloaded in place without dropping the
+    connection; helper modules they import are not watched.
+    """
+
+    def __init__(self, plugins_dir=None):
+        self.plugins_dir = os.path.abspath(plugins_dir) if plugins_dir else None
+        self.plugins = {}
+        self.router = TopicRouter()
+        self._mtimes = {}
+        self._registered = False
+        self._lock = threading.Lock()
+
+    def _module_paths(self):
+        if self.plugins_dir:
+            search_path, prefix = [self.plugins_dir], ""
+        else:
+            import minimax.app.plugins
+
+            search_path, prefix = minimax.app.plugins.__path__, "minimax.app.plugins."
+        for finder, module_name, is_pkg in pkgutil.iter_modules(search_path):
+            path = os.path.join(finder.path, module_name)
+            path = os.path.join(path, "__init__.py") if is_pkg else path + ".py"
+            yield module_name, prefix + module_name, path
+
+    def discover(self):
+        print("[MQTT] Loading plugins...")
+        if self.plugins_dir:
+            if not os.path.isdir(self.plugins_dir):
+                print(f"[MQTT] Provided plugins dir does not exist: {self.plugins_dir}")
+                return self
+            # Keep plugins dir importable during plugin loading
+            if self.plugins_dir not in sys.path:
+                sys.path.insert(0, self.plugins_dir)
+
+        for name, import_name, path in self._module_paths():
+            self._import(name, import_name, path)
+        if not self.plugins:
+            print("[MQTT] No plugins found")
+        return self
+
+    def _import(self, name, import_name, path, reload=False):
+        self._mtimes[name] = os.path.getmtime(path) if os.path.exists(path) else None
+        try:
+            if reload and import_name in sys.modules:
+                mod = importlib.reload(sys.modules[import_name])
+            else:
+                mod = importlib.import_module(import_name)
+        except Exception as e:
+            print(f"[MQTT] Error loading plugin {name}: {e}")
+            return None
+        print(f"[MQTT] Module: {mod} found")
+        if not hasattr(mod, "register"):
+            return None
+        plugin = Plugin(name, mod)
+        self.plugins[name] = plugin
+        return plugin
+
+    def _new_dispatcher(self, plugin):
+        """
+        Settings give the defaults; a plugin can override them with a
+        module-level DISPATCH dict, e.g.
+        DISPATCH = {"workers": 4, "max_queued": 50, "overflow": "drop"}.
+        """
+        options = {
+            "workers": settings.MQTT_PLUGIN_WORKERS,
+            "max_queued": settings.MQTT_PLUGIN_QUEUE_SIZE,
+            "overflow": settings.MQTT_PLUGIN_OVERFLOW,
+        }
+        options.update(getattr(plugin.module, "DISPATCH", {}))
+        return PluginDispatcher(plugin.name, **options)
+
+    def _register(self, client, plugin):
+        print(f"[MQTT] Loading plugin: {plugin.name}")
+        plugin.dispatcher = self._new_dispatcher(plugin)
+        try:
+            plugin.module.register(RegisteringClient(client, plugin, self.router))
+        except Exception as e:
+            print(f"[MQTT] Error registering plugin {plugin.name}: {e}")
+
+    def _unregister(self, client, plugin):
+        self.router.remove_owner(plugin)
+        # Plugins get their dispatcher on the first connect
+        if plugin.dispatcher is not None:
+            plugin.dispatcher.stop()
+            plugin.dispatcher = None
+
+    def subscriptions(self):
+        topics = {}
+        for plugin in self.plugins.values():
+            for topic, qos in plugin.subscriptions.items():
+                topics[topic] = max(qos, topics.get(topic, 0))
+        return topics
+
+    def subscribe(self, client, topics=None):
+        """Sends the given (default: all) subscriptions as one SUBSCRIBE."""
+        topics = self.subscriptions() if topics is None else topics
+        if topics:
+            client.subscribe(list(topics.items()))
+            print(f"[MQTT] Subscribed to {', '.join(topics)}")
+
+    def on_connect(self, client):
+        """Registers plugins on the first connect; afterwards only resubscribes."""
+        with self._lock:
+            if not self._registered:
+                for plugin in self.plugins.values():
+                    self._register(client, plugin)
+                self._registered = True
+            self.subscribe(client)
+
+    def reload_changed(self, client):
+        """Reloads plugin modules whose file changed, appeared or disappeared."""
+        if not self.plugins_dir:
+            return []
+        with self._lock:
+            before = self.subscriptions()
+            seen, changed = set(), []
+            for name, import_name, path in self._module_paths():
+                seen.add(name)
+                if self._mtimes.get(name) == os.path.getmtime(path):
+                    continue
+                plugin = self.plugins.get(name)
+                if plugin is not None:
+                    self._unregister(client, plugin)
+                    del self.plugins[name]
+                plugin = self._import(name, import_name, path, reload=True)
+                if plugin is not None and self._registered:
+                    self._register(client, plugin)
+                changed.append(name)
+            for name in set(self._mtimes) - seen:
+                del self._mtimes[name]
+                if name in self.plugins:
+                    print(f"[MQTT] Removing plugin: {name}")
+                    self._unregister(client, self.plugins.pop(name))
+                    changed.append(name)
+
+            # Before the first connect on_connect subscribes everything
+            if changed and self._registered:
+                after = self.subscriptions()
+                stale = [topic for topic in before if topic not in after]
+                if stale:
+                    client.unsubscribe(stale)
+                self.subscribe(
+                    client,
+                    {t: q for t, q in after.items() if before.get(t) != q},
+                )
+            return changed
+
+    def watch(self, client, interval: float, stop_event: threading.Event):
+        """Polls the plugins dir for changes until stop_event is set."""
+
+        def poll():
+            while not stop_event.wait(interval):
+                # One bad reload must not end hot reload for the process
+                try:
+                    changed = self.reload_changed(client)
+                except Exception as e:
+                    print(f"[MQTT] Error reloading plugins: {e!r}")
+                    continue
+                for name in changed:
+                    print(f"[MQTT] Reloaded plugin: {name}")
+
+        thread = threading.Thread(target=poll, name="mqtt-plugin-watch", daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        for plugin in self.plugins.values():
+            if plugin.dispatcher is not None:
+                plugin.dispatcher.stop()
+
+    def stats(self):
+        stats = {
+            name: plugin.dispatcher.stats()
+            for name, plugin in self.plugins.items()
+            if plugin.dispatcher is not None
+        }
+        stats["router"] = self.router.stats()
+        return stats
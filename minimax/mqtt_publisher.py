@@ -1,12 +1,157 @@
 import paho.mqtt.client as mqtt
+import atexit
 import json
+import threading
+from collections import deque
+from functools import lru_cache
+
+
+class MQTTPublisher:
+    """
+    One long-lived MQTT connection for publishing, driven by paho's
+    background network loop.
+
+    The client reconnects on its own after a broker bounce. Messages
+    published while disconnected wait in a bounded outbound queue (oldest
+    dropped first when full) and are sent as soon as the connection is back.
+    """
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 1883,
+        username: str = "",
+        password: str = "",
+        keepalive: int = 60,
+        max_queued: int = 1000,
+        qos: int = 1,
+    ):
+        self.host = host
+        self.port = port
+        self.qos = qos
+        self._pending = deque(maxlen=max_queued)
+        self._lock = threading.Lock()
+        self._connected = threading.Event()
+        self._ever_connected = False
+        self._last_info = None
+        self.stats = {"published": 0, "queued": 0, "dropped": 0, "reconnects": 0}
+
+        self.client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
+        if username and password:
+            self.client.username_pw_set(username, password)
+        self.client.reconnect_delay_set(min_delay=1, max_delay=30)
+        self.client.on_connect = self._on_connect
+        self.client.on_disconnect = self._on_disconnect
+        self.client.connect_async(host, port, keepalive)
+        self.client.loop_start()
+
+    def _on_connect(self, client, userdata, flags, reason_code, properties):
+        if reason_code.is_failure:
+            print(f"[MQTT] Publisher failed to connect: {reason_code}")
+            return
+        if self._ever_connected:
+            self.stats["reconnects"] += 1
+        self._ever_connected = True
+        self._connected.set()
+        self._flush()
+
+    def _on_disconnect(self, client, userdata, flags, reason_code, properties):
+        self._connected.clear()
+        if reason_code != 0:
+            print(f"[MQTT] Publisher disconnected ({reason_code}), reconnecting...")
+
+    def _flush(self):
+        with self._lock:
+            while self._pending and self._connected.is_set():
+                topic, payload, qos, retain = self._pending.popleft()
+                info = self.client.publish(topic, payload, qos, retain)
+                if info.rc == mqtt.MQTT_ERR_NO_CONN:
+                    self._connected.clear()
+                    # As in publish(): only qos 0 is not kept by paho
+                    if qos == 0:
+                        self._pending.appendleft((topic, payload, qos, retain))
+                        break
+                self._last_info = info
+                self.stats["published"] += 1
+
+    def _enqueue(self, topic, payload, qos, retain):
+        if len(self._pending) == self._pending.maxlen:
+            self.stats["dropped"] += 1
+        self._pending.append((topic, payload, qos, retain))
+        self.stats["queued"] += 1
+
+    def publish(self, topic: str, payload, qos: int = None, retain: bool = False):
+        """
+        Publishes one message, or queues it while disconnected. Returns paho's
+        MQTTMessageInfo when handed to paho (which holds qos 1/2 messages
+        through a dropped connection), otherwise None.
+        """
+        qos = self.qos if qos is None else qos
+        with self._lock:
+            if not self._connected.is_set() or self._pending:
+                # Keep ordering behind anything already waiting
+                self._enqueue(topic, payload, qos, retain)
+                return None
+            info = self.client.publish(topic, payload, qos, retain)
+            if info.rc == mqtt.MQTT_ERR_NO_CONN:
+                self._connected.clear()
+                # paho keeps qos 1/2 messages and resends them itself after
+                # CONNACK; queueing those here too would deliver them twice
+                if qos == 0:
+                    self._enqueue(topic, payload, qos, retain)
+                    return None
+            self.stats["published"] += 1
+            self._last_info = info
+            return info
+
+    def publish_many(self, messages, qos: int = None, timeout: float = None):
+        """
+        Publishes an iterable of (topic, payload) pairs. With a timeout, waits
+        until the broker has acknowledged every message that was sent.
+        """
+        infos = [self.publish(topic, payload, qos) for topic, payload in messages]
+        if timeout is not None:
+            for info in infos:
+                if info is not None:
+                    info.wait_for_publish(timeout)
+        return infos
+
+    def wait_until_connected(self, timeout: float = None) -> bool:
+        return self._connected.wait(timeout)
+
+    def close(self, timeout: float = 2.0):
+        """Sends whatever is still queued if connected, then disconnects."""
+        if self.wait_until_connected(timeout):
+            self._flush()
+            if self._last_info is not None:
+                try:
+                    self._last_info.wait_for_publish(timeout)
+                except (RuntimeError, ValueError):
+                    pass
+        self.client.disconnect()
+        self.client.loop_stop()
+
+
+@lru_cache(maxsize=None)
+def get_publisher(host: str = None, port: int = None):
+    """Process-wide publisher per broker, closed when the process exits."""
+    from minimax.app.core.config import settings
+
+    publisher = MQTTPublisher(
+        host or settings.MQTT_HOST,
+        port or settings.MQTT_PORT,
+        settings.MQTT_USERNAME,
+        settings.MQTT_PASSWORD,
+    )
+    atexit.register(publisher.close)
+    return publisher
 
 
 def publish_message(
     topic: str, message: str, host: str = "localhost", port: int = 1883
 ):
     """
-    Publish a message to an MQTT topic
+    Publish a message to an MQTT topic over the shared connection
 
     Args:
         topic (str): The MQTT topic to publish to
@@ -14,10 +159,7 @@ def publish_message(
         host (str): MQTT broker host (default: localhost)
         port (int): MQTT broker port (default: 1883)
     """
-    client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
-    client.connect(host, port, 60)
-    client.publish(topic, message)
-    client.disconnect()
+    return get_publisher(host, port).publish(topic, message)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,245 @@
+import json
+import threading
+from typing import Any, NamedTuple, Tuple
+
+SHARED_PREFIX = "$share/"
+
+
+def _decode_text(payload: bytes):
+    return payload.decode("utf-8")
+
+
+def _decode_json(payload: bytes):
+    return json.loads(payload)
+
+
+DECODERS = {
+    "raw": None,
+    "text": _decode_text,
+    "json": _decode_json,
+}
+
+
+def parse_filter(topic_filter: str):
+    """
+    Splits a subscription filter into (share group, levels). Shared
+    subscriptions ("$share/<group>/<filter>") are load-balanced by the broker
+    but delivered with the plain topic, so only <filter> takes part in routing.
+    """
+    group = None
+    if topic_filter.startswith(SHARED_PREFIX):
+        group, _, topic_filter = topic_filter[len(SHARED_PREFIX) :].partition("/")
+        if not group or not topic_filter:
+            raise ValueError(f"Invalid shared subscription: {SHARED_PREFIX}{group}")
+    levels = topic_filter.split("/")
+    for index, level in enumerate(levels):
+        if "#" in level and (level != "#" or index != len(levels) - 1):
+            raise ValueError(f"'#' must be the last level on its own: {topic_filter}")
+        if "+" in level and level != "+":
+            raise ValueError(f"'+' must occupy a whole level: {topic_filter}")
+    return group, levels
+
+
+class RoutedMessage(NamedTuple):
+    """What a route's handler receives: the decoded payload plus the topic
+    levels matched by its wildcards."""
+
+    topic: str
+    payload: Any
+    params: Tuple[str, ...]
+    qos: int
+    retain: bool
+    message: Any
+
+
+class Route:
+    """
+    One subscription filter and its handler. With a dispatcher (see
+    mqtt_dispatch.PluginDispatcher) decoding and the handler run on the
+    dispatcher's lanes; without one they run on the calling thread.
+    """
+
+    def __init__(
+        self,
+        topic_filter: str,
+        handler,
+        decoder=None,
+        raw=False,
+        owner=None,
+        dispatcher=None,
+    ):
+        self.filter = topic_filter
+        self.group, self.levels = parse_filter(topic_filter)
+        self.handler = handler
+        if decoder is None or isinstance(decoder, str):
+            decoder = DECODERS[decoder or "raw"]
+        self.decoder = decoder
+        self.raw = raw
+        self.owner = owner
+        self.dispatcher = dispatcher
+        self.matched = 0
+        self.decode_errors = 0
+
+    def params(self, topic_levels):
+        """The topic levels that matched this route's + and # wildcards."""
+        params = []
+        for index, level in enumerate(self.levels):
+            if level == "+":
+                params.append(topic_levels[index])
+            elif level == "#":
+                params.append("/".join(topic_levels[index:]))
+        return tuple(params)
+
+    def build_message(self, message):
+        """
+        Raw routes (plain message_callback_add) get paho's message untouched;
+        everything else gets a RoutedMessage with the decoded payload.
+        """
+        if self.raw:
+            return message
+        payload = message.payload
+        if self.decoder is not None:
+            payload = self.decoder(payload)
+        return RoutedMessage(
+            message.topic,
+            payload,
+            self.params(message.topic.split("/")),
+            message.qos,
+            message.retain,
+            message,
+        )
+
+    def __call__(self, client, userdata, message):
+        try:
+            routed = self.build_message(message)
+        except Exception as exc:
+            self.decode_errors += 1
+            print(f"[MQTT] Could not decode {message.topic} for {self.filter}: {exc}")
+            return
+        return self.handler(client, userdata, routed)
+
+
+class _Node:
+    __slots__ = ("children", "routes")
+
+    def __init__(self):
+        self.children = {}
+        self.routes = []
+
+
+class TopicRouter:
+    """
+    Matches an incoming topic against every subscription filter by walking a
+    trie of topic levels, so a lookup costs O(topic depth) rather than
+    O(number of routes). Supports "+" and "#" wildcards, shared subscriptions
+    and a payload decoder per route. Topics starting with "$" are not matched
+    by a leading wildcard, as the MQTT spec requires.
+
+    Routes are added and removed by the plugin watch thread while paho's
+    network thread matches, so both take a lock; a match holds it only for
+    the trie walk, not while handlers run.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._root = _Node()
+        self.routes = []
+        self.unmatched = 0
+
+    def add(
+        self,
+        topic_filter: str,
+        handler,
+        decoder=None,
+        raw=False,
+        owner=None,
+        dispatcher=None,
+    ) -> Route:
+        route = Route(topic_filter, handler, decoder, raw, owner, dispatcher)
+        with self._lock:
+            node = self._root
+            for level in route.levels:
+                node = node.children.setdefault(level, _Node())
+            node.routes.append(route)
+            self.routes.append(route)
+        return route
+
+    def remove(self, route: Route):
+        with self._lock:
+            self._remove(route)
+
+    def _remove(self, route: Route):
+        path = [self._root]
+        for level in route.levels:
+            node = path[-1].children.get(level)
+            if node is None:
+                return
+            path.append(node)
+        if route in path[-1].routes:
+            path[-1].routes.remove(route)
+            self.routes.remove(route)
+        # Prune branches left empty
+        for parent, level, node in zip(
+            reversed(path[:-1]), reversed(route.levels), reversed(path[1:])
+        ):
+            if node.routes or node.children:
+                break
+            del parent.children[level]
+
+    def remove_owner(self, owner):
+        with self._lock:
+            for route in [route for route in self.routes if route.owner is owner]:
+                self._remove(route)
+
+    def match(self, topic: str):
+        with self._lock:
+            return self._match(topic)
+
+    def _match(self, topic: str):
+        levels = topic.split("/")
+        matches = []
+        nodes = [self._root]
+        for depth, level in enumerate(levels):
+            next_nodes = []
+            for node in nodes:
+                children = node.children
+                if not children:
+                    continue
+                wildcards = depth > 0 or not level.startswith("$")
+                if wildcards and "#" in children:
+                    matches.extend(children["#"].routes)
+                if level in children:
+                    next_nodes.append(children[level])
+                if wildcards and "+" in children:
+                    next_nodes.append(children["+"])
+            nodes = next_nodes
+            if not nodes:
+                return matches
+        for node in nodes:
+            matches.extend(node.routes)
+            # "a/#" also matches "a" itself
+            if "#" in node.children:
+                matches.extend(node.children["#"].routes)
+        return matches
+
+    def on_message(self, client, userdata, message):
+        """paho on_message callback: runs every route matching the topic."""
+        routes = self.match(message.topic)
+        if not routes:
+            self.unmatched += 1
+            return
+        for route in routes:
+            route.matched += 1
+            if route.dispatcher is not None:
+                route.dispatcher.submit(route, client, userdata, message)
+            else:
+                route(client, userdata, message)
+
+    def stats(self):
+        with self._lock:
+            routes = list(self.routes)
+        return {
+            "routes": len(routes),
+            "unmatched": self.unmatched,
+            "decode_errors": sum(route.decode_errors for route in routes),
+        }
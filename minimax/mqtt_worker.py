@@ -1,59 +1,18 @@
 # mqtt_worker.py
 import paho.mqtt.client as mqtt
-import importlib
-import pkgutil
 from minimax.app.core.config import settings
+from minimax.mqtt_plugins import PluginRegistry
+import json
+import threading
 import time
-import sys
-import os
-
-
-def load_plugins(client, plugins_dir=None):
-    print("[MQTT] Loading plugins...")
-    found_plugins = False
-
-    if plugins_dir:
-        plugins_dir = os.path.abspath(plugins_dir)
-        if not os.path.isdir(plugins_dir):
-            print(f"[MQTT] Provided plugins dir does not exist: {plugins_dir}")
-            return
-
-        # Keep plugins dir importable during plugin loading
-        if plugins_dir not in sys.path:
-            sys.path.insert(0, plugins_dir)
-
-        for _, module_name, _ in pkgutil.iter_modules([plugins_dir]):
-            found_plugins = True
-            try:
-                mod = importlib.import_module(module_name)
-                print(f"[MQTT] Module: {mod} found")
-                if hasattr(mod, "register"):
-                    print(f"[MQTT] Loading plugin: {module_name}")
-                    mod.register(client)
-            except Exception as e:
-                print(f"[MQTT] Error loading plugin {module_name}: {e}")
-    else:
-        import minimax.app.plugins
-
-        for _, module_name, _ in pkgutil.iter_modules(minimax.app.plugins.__path__):
-            found_plugins = True
-            mod = importlib.import_module(f"minimax.app.plugins.{module_name}")
-            print(f"[MQTT] Module: {mod} found")
-            if hasattr(mod, "register"):
-                print(f"[MQTT] Loading plugin: {module_name}")
-                mod.register(client)
-
-    if not found_plugins:
-        print("[MQTT] No plugins found")
 
 
 def on_connect(client, userdata, flags, rc):
     if rc == 0:
         print("[MQTT] Connected successfully to broker")
-        plugins_dir = None
-        if isinstance(userdata, dict):
-            plugins_dir = userdata.get("plugins_dir")
-        load_plugins(client, plugins_dir=plugins_dir)
+        # Plugins are registered on the first connect only; reconnects just
+        # restore their subscriptions
+        userdata["registry"].on_connect(client)
     else:
         print(f"[MQTT] Failed to connect, return code: {rc}")
         # Connection return codes:
@@ -72,12 +31,16 @@ def on_disconnect(client, userdata, rc):
         print("[MQTT] Disconnected successfully")
 
 
-def start_mqtt(plugins_dir=None):
+def start_mqtt(plugins_dir=None, hot_reload=False):
     print("[MQTT] Initializing MQTT client...")
     client = mqtt.Client(client_id=settings.MQTT_CLIENT_ID)
 
-    # Pass plugins_dir via userdata to callbacks
-    client.user_data_set({"plugins_dir": plugins_dir})
+    # Plugins are discovered and imported once, before connecting
+    registry = PluginRegistry(plugins_dir).discover()
+    client.user_data_set({"registry": registry})
+    # Every plugin route is matched by the registry's topic trie
+    client.on_message = registry.router.on_message
+    stop_watching = threading.Event()
 
     # Set callbacks
     client.on_connect = on_connect
@@ -94,16 +57,29 @@ def start_mqtt(plugins_dir=None):
         # Use loop_start() instead of loop_forever() for better error handling
         client.loop_start()
 
+        if hot_reload and plugins_dir:
+            print(f"[MQTT] Watching {plugins_dir} for plugin changes")
+            registry.watch(client, settings.MQTT_PLUGIN_RELOAD_INTERVAL, stop_watching)
+
         # Keep the main thread alive
+        last_report = time.monotonic()
         while True:
             time.sleep(1)
+            if (
+                settings.MQTT_STATS_INTERVAL > 0
+                and time.monotonic() - last_report >= settings.MQTT_STATS_INTERVAL
+            ):
+                last_report = time.monotonic()
+                print(f"[MQTT] Plugin stats {json.dumps(registry.stats())}")
     except Exception as e:
         print(f"[MQTT] Connection error: {e}")
         raise
     finally:
         print("[MQTT] Stopping MQTT client...")
+        stop_watching.set()
         client.loop_stop()
         client.disconnect()
+        registry.stop()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,125 @@
+import asyncio
+import numpy as np
+from minimax.app.services.inference import EmbeddingBatcher
+
+
+class RecordingEncoder:
+    """Encodes text "n" as [n] and records the texts of every call."""
+
+    def __init__(self, fail_on=None):
+        self.batches = []
+        self.fail_on = fail_on
+
+    def __call__(self, texts):
+        self.batches.append(list(texts))
+        if self.fail_on in texts:
+            raise RuntimeError("encode failed")
+        return np.array([[float(text)] for text in texts], dtype=np.float32)
+
+
+def run(coro):
+    return asyncio.run(asyncio.wait_for(coro, 30))
+
+
+async def started(encoder, **kwargs):
+    return await EmbeddingBatcher(encoder, **kwargs).start()
+
+
+def test_concurrent_embeds_share_one_encode():
+    encoder = RecordingEncoder()
+
+    async def scenario():
+        batcher = await started(encoder, max_batch_size=8, max_wait_ms=50)
+        try:
+            return await asyncio.gather(*(batcher.embed(str(i)) for i in range(3)))
+        finally:
+            await batcher.stop()
+
+    vectors = run(scenario())
+    assert [vector[0] for vector in vectors] == [0.0, 1.0, 2.0]
+    assert encoder.batches == [["0", "1", "2"]]
+
+
+def test_batches_are_capped_at_max_batch_size():
+    encoder = RecordingEncoder()
+
+    async def scenario():
+        batcher = await started(encoder, max_batch_size=4, max_wait_ms=50)
+        try:
+            await asyncio.gather(*(batcher.embed(str(i)) for i in range(10)))
+        finally:
+            await batcher.stop()
+
+    run(scenario())
+    assert [len(batch) for batch in encoder.batches] == [4, 4, 2]
+
+
+def test_batch_is_flushed_after_max_wait():
+    encoder = RecordingEncoder()
+
+    async def scenario():
+        batcher = await started(encoder, max_batch_size=8, max_wait_ms=10)
+        try:
+            first = asyncio.ensure_future(batcher.embed("1"))
+            await asyncio.sleep(0.2)
+            # Encoded on its own, without waiting for a second text
+            assert first.done()
+            await batcher.embed("2")
+        finally:
+            await batcher.stop()
+
+    run(scenario())
+    assert encoder.batches == [["1"], ["2"]]
+
+
+def test_texts_arriving_at_the_deadline_are_neither_lost_nor_repeated():
+    encoder = RecordingEncoder()
+    max_wait = 0.005
+    rounds = 200
+
+    async def scenario():
+        batcher = await started(encoder, max_batch_size=64, max_wait_ms=max_wait * 1000)
+
+        async def late(text, delay):
+            await asyncio.sleep(delay)
+            return await batcher.embed(text)
+
+        rng = np.random.default_rng(0)
+        tasks = []
+        try:
+            for i in range(rounds):
+                tasks.append(asyncio.create_task(batcher.embed(str(2 * i))))
+                # Lands just before, at or just after the moment the first
+                # text's batch is flushed
+                delay = max_wait * rng.uniform(0.8, 1.2)
+                tasks.append(asyncio.create_task(late(str(2 * i + 1), delay)))
+                await asyncio.sleep(max_wait * 2)
+            return await asyncio.gather(*tasks)
+        finally:
+            await batcher.stop()
+
+    vectors = run(scenario())
+    assert [vector[0] for vector in vectors] == [float(i) for i in range(2 * rounds)]
+    encoded = sorted(int(text) for batch in encoder.batches for text in batch)
+    assert encoded == list(range(2 * rounds))
+
+
+def test_encode_errors_reach_every_caller_in_the_batch():
+    encoder = RecordingEncoder(fail_on="1")
+
+    async def scenario():
+        batcher = await started(encoder, max_batch_size=8, max_wait_ms=50)
+        try:
+            results = await asyncio.gather(
+                *(batcher.embed(str(i)) for i in range(3)), return_exceptions=True
+            )
+            # The batcher keeps serving after a failed batch
+            after = await batcher.embed("5")
+        finally:
+            await batcher.stop()
+        return results, after
+
+    results, after = run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert after[0] == 5.0
+    assert encoder.batches[-1] == ["5"]
@@ -0,0 +1,93 @@
+import multiprocessing
+import os
+import numpy as np
+from minimax.app.services.embedding_cache import EmbeddingCache
+
+DIM = 4
+
+
+def encode_numbers(texts):
+    """Encodes text "tN" as [N, N, N, N]."""
+    return np.array([[float(text[1:])] * DIM for text in texts], dtype=np.float32)
+
+
+def failing_encode(texts):
+    raise AssertionError(f"unexpected encode of {texts}")
+
+
+def open_cache(path, **kwargs):
+    return EmbeddingCache(str(path), "test/model", DIM, **kwargs)
+
+
+def assert_numbers(vectors, numbers):
+    np.testing.assert_array_equal(vectors[:, 0], numbers)
+
+
+def test_entries_survive_a_reload(tmp_path):
+    cache = open_cache(tmp_path)
+    first = cache.encode(["t1", "t2", "t1"], encode_numbers)
+    assert_numbers(first, [1, 2, 1])
+    assert cache.stats()["misses"] == 3
+    assert len(cache) == 2
+
+    reloaded = open_cache(tmp_path)
+    assert len(reloaded) == 2
+    assert_numbers(reloaded.encode(["T1 ", "t2"], failing_encode), [1, 2])
+    assert reloaded.stats()["store_hits"] == 2
+
+
+def test_keys_ending_in_nul_bytes_are_found_after_a_reload(tmp_path):
+    cache = open_cache(tmp_path)
+    # Roughly 1 in 256 digests ends in a NUL byte
+    text = next(f"t{n}" for n in range(100000) if cache.key(f"t{n}").endswith(b"\0"))
+    cache.encode([text], encode_numbers)
+
+    reloaded = open_cache(tmp_path)
+    assert reloaded.key(text) in reloaded._rows
+    assert_numbers(reloaded.encode([text], failing_encode), [float(text[1:])])
+
+
+def test_torn_record_is_dropped_on_load(tmp_path):
+    cache = open_cache(tmp_path)
+    cache.encode(["t1", "t2"], encode_numbers)
+    with open(cache.file_path, "ab") as file:
+        file.write(b"\x01" * 10)
+
+    reloaded = open_cache(tmp_path)
+    assert os.path.getsize(cache.file_path) == 2 * reloaded._dtype.itemsize
+    assert_numbers(reloaded.encode(["t1", "t2", "t3"], encode_numbers), [1, 2, 3])
+
+
+def fill(path, worker, batches, batch_size):
+    # No LRU, so reads go through the row numbers this process recorded
+    cache = open_cache(path, lru_size=0)
+    for batch in range(batches):
+        start = (worker * batches + batch) * batch_size
+        # Every worker also re-encodes t0, which any of them may have written
+        texts = ["t0"] + [f"t{n}" for n in range(start, start + batch_size)]
+        cache.encode(texts, encode_numbers)
+        numbers = [0] + list(range(start, start + batch_size))
+        assert_numbers(cache.encode(texts, failing_encode), numbers)
+
+
+def test_processes_appending_at_once_do_not_overwrite_each_other(tmp_path):
+    workers, batches, batch_size = 4, 25, 8
+    context = multiprocessing.get_context("fork")
+    processes = [
+        context.Process(target=fill, args=(tmp_path, worker, batches, batch_size))
+        for worker in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(30)
+        assert process.exitcode == 0
+
+    total = workers * batches * batch_size
+    reloaded = open_cache(tmp_path)
+    # t0 can be written by more than one process before it is on disk
+    records = os.path.getsize(reloaded.file_path) // reloaded._dtype.itemsize
+    assert total <= records <= total + workers
+    assert len(reloaded) == total
+    texts = [f"t{n}" for n in range(total)]
+    assert_numbers(reloaded.encode(texts, failing_encode), range(total))
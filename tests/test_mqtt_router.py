@@ -0,0 +1,171 @@
+import threading
+import pytest
+from minimax.mqtt_router import RoutedMessage, TopicRouter, parse_filter
+
+
+class Message:
+    def __init__(self, topic, payload=b"", qos=0, retain=False):
+        self.topic = topic
+        self.payload = payload
+        self.qos = qos
+        self.retain = retain
+
+
+def handler(client, userdata, message):
+    return message
+
+
+def matched(router, topic):
+    return sorted(route.filter for route in router.match(topic))
+
+
+@pytest.fixture
+def router():
+    router = TopicRouter()
+    for topic_filter in [
+        "home/lights/kitchen",
+        "home/+/kitchen",
+        "home/#",
+        "#",
+        "+/lights/+",
+        "$SYS/#",
+    ]:
+        router.add(topic_filter, handler)
+    return router
+
+
+def test_exact_and_wildcard_matches(router):
+    assert matched(router, "home/lights/kitchen") == [
+        "#",
+        "+/lights/+",
+        "home/#",
+        "home/+/kitchen",
+        "home/lights/kitchen",
+    ]
+    assert matched(router, "home/doors/kitchen") == ["#", "home/#", "home/+/kitchen"]
+    assert matched(router, "office/lights/desk") == ["#", "+/lights/+"]
+
+
+def test_plus_matches_exactly_one_level(router):
+    assert "+/lights/+" not in matched(router, "home/lights")
+    assert "+/lights/+" not in matched(router, "home/lights/kitchen/lamp")
+    assert "home/+/kitchen" in matched(router, "home//kitchen")
+
+
+def test_hash_matches_its_parent_level(router):
+    assert matched(router, "home") == ["#", "home/#"]
+
+
+def test_dollar_topics_skip_leading_wildcards(router):
+    assert matched(router, "$SYS/broker/uptime") == ["$SYS/#"]
+    router.add("+/broker/uptime", handler)
+    assert matched(router, "$SYS/broker/uptime") == ["$SYS/#"]
+    # Only the first level is special
+    assert "home/#" in matched(router, "home/$state")
+
+
+def test_shared_subscription_routes_on_the_plain_filter():
+    router = TopicRouter()
+    route = router.add("$share/workers/sensors/+/temp", handler)
+    assert route.group == "workers"
+    assert route.levels == ["sensors", "+", "temp"]
+    assert router.match("sensors/attic/temp") == [route]
+    assert router.match("$share/workers/sensors/attic/temp") == []
+
+
+@pytest.mark.parametrize(
+    "topic_filter",
+    ["home/#/kitchen", "home/li#", "home/li+", "$share/", "$share/workers"],
+)
+def test_invalid_filters_are_rejected(topic_filter):
+    with pytest.raises(ValueError):
+        parse_filter(topic_filter)
+
+
+def test_remove_prunes_empty_branches():
+    router = TopicRouter()
+    deep = router.add("a/b/c/d", handler)
+    shallow = router.add("a/b", handler)
+    router.remove(deep)
+    assert router.match("a/b/c/d") == []
+    assert router.match("a/b") == [shallow]
+    assert list(router._root.children["a"].children["b"].children) == []
+    router.remove(shallow)
+    assert router._root.children == {}
+    assert router.routes == []
+    # Removing twice is a no-op
+    router.remove(shallow)
+
+
+def test_remove_owner_leaves_other_owners_routes():
+    router = TopicRouter()
+    mine, theirs = object(), object()
+    router.add("a/+", handler, owner=mine)
+    router.add("a/#", handler, owner=mine)
+    kept = router.add("a/+", handler, owner=theirs)
+    router.remove_owner(mine)
+    assert router.match("a/b") == [kept]
+    assert router.routes == [kept]
+
+
+def test_on_message_decodes_payload_and_wildcard_params():
+    router = TopicRouter()
+    received = []
+    router.add(
+        "sensors/+/readings/#",
+        lambda client, userdata, message: received.append(message),
+        decoder="json",
+    )
+    router.on_message(
+        None, None, Message("sensors/attic/readings/temp/c", b'{"v": 21}')
+    )
+    (message,) = received
+    assert isinstance(message, RoutedMessage)
+    assert message.payload == {"v": 21}
+    assert message.params == ("attic", "temp/c")
+
+    router.on_message(None, None, Message("elsewhere"))
+    assert router.stats()["unmatched"] == 1
+
+
+def test_decode_errors_are_counted_not_raised():
+    router = TopicRouter()
+    received = []
+    router.add("a", lambda *args: received.append(args), decoder="json")
+    router.on_message(None, None, Message("a", b"not json"))
+    assert received == []
+    assert router.stats()["decode_errors"] == 1
+
+
+def test_raw_routes_get_the_message_untouched():
+    router = TopicRouter()
+    received = []
+    router.add(
+        "a", lambda client, userdata, message: received.append(message), raw=True
+    )
+    message = Message("a", b"payload")
+    router.on_message(None, None, message)
+    assert received == [message]
+
+
+@pytest.mark.parametrize("change", ["add", "remove", "remove_owner"])
+def test_route_changes_wait_for_a_match_in_progress(change):
+    router = TopicRouter()
+    owner = object()
+    route = router.add("home/lights/#", handler, owner=owner)
+    calls = {
+        "add": lambda: router.add("home/doors/#", handler),
+        "remove": lambda: router.remove(route),
+        "remove_owner": lambda: router.remove_owner(owner),
+    }
+    before = list(router.routes)
+    # Held as match() holds it while walking the trie
+    with router._lock:
+        writer = threading.Thread(target=calls[change])
+        writer.start()
+        writer.join(0.05)
+        assert writer.is_alive()
+        assert router.routes == before
+    writer.join(5)
+    assert not writer.is_alive()
+    assert router.routes != before
@@ -0,0 +1,156 @@
+import wave
+import numpy as np
+import pytest
+from minimax.app.stt.src.capture import (
+    CHUNK_SIZE,
+    SAMPLE_RATE,
+    FrameRingBuffer,
+    SpeechSegmenter,
+    WavFileSource,
+    iter_wav_segments,
+)
+
+# 30 ms frames: 3 frames of pre-roll, 5 of hangover
+SEGMENTER = {"pre_roll_ms": 90, "hangover_ms": 150}
+
+
+def is_speech(frame: bytes, sample_rate: int) -> bool:
+    """Stands in for webrtcvad: any non-zero sample is speech."""
+    return np.frombuffer(frame, dtype=np.int16).any()
+
+
+def write_wav(path, layout):
+    """
+    Writes frames described by [(count, speech?), ...]. Speech frame i holds
+    the value 1000 + i, so a segment's frames can be told apart. Returns the
+    samples as (frames, CHUNK_SIZE).
+    """
+    frames = []
+    for count, speech in layout:
+        for _ in range(count):
+            value = 1000 + len(frames) if speech else 0
+            frames.append(np.full(CHUNK_SIZE, value, dtype=np.int16))
+    samples = np.stack(frames)
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes(samples.tobytes())
+    return samples
+
+
+def segments(path, **kwargs):
+    return list(iter_wav_segments(path, is_speech=is_speech, **SEGMENTER, **kwargs))
+
+
+def test_utterances_padded_with_pre_roll_and_hangover(tmp_path):
+    path = tmp_path / "two.wav"
+    samples = write_wav(
+        path, [(10, False), (4, True), (20, False), (3, True), (10, False)]
+    )
+
+    first, second = segments(path)
+
+    # Speech in frames 10-13: 3 frames before, 5 after
+    np.testing.assert_array_equal(first, samples[7:19].reshape(-1))
+    # Speech in frames 34-36
+    np.testing.assert_array_equal(second, samples[31:42].reshape(-1))
+
+
+def test_speech_running_to_the_end_of_the_file_is_emitted(tmp_path):
+    path = tmp_path / "tail.wav"
+    samples = write_wav(path, [(5, False), (4, True)])
+
+    (segment,) = segments(path)
+
+    np.testing.assert_array_equal(segment, samples[2:9].reshape(-1))
+
+
+def test_long_speech_is_split_at_max_segment_length(tmp_path):
+    path = tmp_path / "long.wav"
+    samples = write_wav(path, [(25, True), (10, False)])
+
+    found = segments(path, max_segment_ms=300)
+
+    # 10-frame pieces, and no pre-roll repeated from the previous piece
+    assert [len(segment) // CHUNK_SIZE for segment in found] == [10, 10, 10]
+    np.testing.assert_array_equal(np.concatenate(found), samples[:30].reshape(-1))
+
+
+def test_pre_roll_does_not_repeat_the_previous_hangover(tmp_path):
+    path = tmp_path / "close.wav"
+    samples = write_wav(path, [(2, True), (6, False), (2, True), (10, False)])
+
+    first, second = segments(path)
+
+    # The first utterance ends at frame 7; the second's pre-roll would
+    # otherwise start at frame 5
+    np.testing.assert_array_equal(first, samples[0:7].reshape(-1))
+    np.testing.assert_array_equal(second, samples[7:15].reshape(-1))
+
+
+def test_silence_gives_no_segments(tmp_path):
+    path = tmp_path / "silence.wav"
+    write_wav(path, [(50, False)])
+
+    assert segments(path) == []
+
+
+def test_partial_final_frame_is_zero_padded(tmp_path):
+    path = tmp_path / "partial.wav"
+    samples = np.full(CHUNK_SIZE * 3 + 100, 2000, dtype=np.int16)
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes(samples.tobytes())
+
+    (segment,) = segments(path)
+
+    assert len(segment) == 4 * CHUNK_SIZE
+    np.testing.assert_array_equal(segment[: len(samples)], samples)
+    assert not segment[len(samples) :].any()
+
+
+def test_wav_source_rejects_other_formats(tmp_path):
+    path = tmp_path / "stereo.wav"
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(2)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes(bytes(4 * CHUNK_SIZE))
+
+    with pytest.raises(ValueError):
+        WavFileSource(path)
+
+
+def test_ring_copy_wraps_and_detects_overwritten_frames():
+    ring = FrameRingBuffer(4, frame_samples=2)
+    for value in range(6):
+        ring.write(np.full(2, value, dtype=np.int16))
+
+    assert ring.oldest == 2
+    np.testing.assert_array_equal(ring.copy(2, 6), [2, 2, 3, 3, 4, 4, 5, 5])
+    with pytest.raises(IndexError):
+        ring.copy(1, 3)
+    with pytest.raises(IndexError):
+        ring.frame(0)
+
+
+def test_segmenter_that_falls_a_ring_behind_skips_ahead():
+    ring = FrameRingBuffer(8, CHUNK_SIZE)
+    segmenter = SpeechSegmenter(ring, is_speech=is_speech, **SEGMENTER)
+    # Written before the segmenter reads anything: the first 12 frames are lost
+    for value in range(20):
+        ring.write(np.full(CHUNK_SIZE, 1000 + value, dtype=np.int16))
+    ring.close()
+
+    segmenter.run()
+
+    assert segmenter.dropped_frames == 12
+    found = []
+    while (segment := segmenter.segments.get_nowait()) is not None:
+        found.append(segment)
+    # Segments are capped at half the ring, so the 8 frames left come as 2
+    assert [len(segment) // CHUNK_SIZE for segment in found] == [4, 4]
+    assert np.concatenate(found)[::CHUNK_SIZE].tolist() == list(range(1012, 1020))